@@ -1,21 +1,67 @@
 import argparse
+import json
+import os
 from cmd import Cmd
 import shlex
-from filelock import FileLock
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Iterable
 from prettytable import PrettyTable
-from sqlalchemy.orm import sessionmaker, class_mapper
-from database.account import AccountHandler
-from database.client import ClientHandler
+from database.daemon import RemoteHandler
+
+# The database layer (SQLAlchemy, DuckDB) is only imported for local handlers, a CLI
+# connected to the daemon never loads it
+if TYPE_CHECKING:
+    from filelock import FileLock
+    from database.cache import RowCache
+
+# Rows fetched and printed per table by the list command
+PAGE_SIZE = 100
 
 class AccountManagerCLI(Cmd):
     intro = 'Welcome to the Account Manager CLI. Type help or ? to list commands.\n'
     prompt = '(account-manager) '
     
-    def __init__(self, filelock: FileLock) -> None:
-        self.account = AccountHandler(filelock)
-        self.client = ClientHandler(filelock)
+    def __init__(self, filelock: "FileLock", daemon_address: str = None, row_cache: "RowCache" = None, json_lines: bool = False) -> None:
+        self.scheduler = None
+        self.row_cache = row_cache
+        self.json_lines = json_lines
+        self.line_number = None
+        self.failed = False
+        self._changes = None
+        
+        if daemon_address:
+            # Every operation runs inside the database daemon
+            self.account = RemoteHandler("account", daemon_address)
+            self.client = RemoteHandler("client", daemon_address)
+            self.bulk = RemoteHandler("bulk", daemon_address)
+            self.stats = RemoteHandler("stats", daemon_address)
+            self.row_cache = RemoteHandler("row_cache", daemon_address)
+            self._changes_source = RemoteHandler("changes", daemon_address)
+        else:
+            from database.account import AccountHandler
+            from database.bulk import BulkLoader
+            from database.client import ClientHandler
+            from database.feed import ChangeLogHandler
+            from database.scheduler import LockScheduler
+            from database.stats import recorder
+            
+            self.scheduler = filelock if isinstance(filelock, LockScheduler) else None
+            self.account = AccountHandler(filelock, row_cache=row_cache)
+            self.client = ClientHandler(filelock, row_cache=row_cache)
+            self.bulk = BulkLoader(filelock)
+            self.stats = recorder
+            self._changes_source = ChangeLogHandler(filelock)
         
         super().__init__()
+    
+    @property
+    def changes(self):
+        # Built on first use, importing the feed loads the database layer
+        if self._changes is None:
+            from database.feed import ChangeFeed
+            self._changes = ChangeFeed(self._changes_source)
+        
+        return self._changes
         
     @staticmethod
     def query_result_to_table(result_obj) -> PrettyTable:
@@ -36,6 +82,8 @@ class AccountManagerCLI(Cmd):
         if not sqlalchemy_list_result:
             return "Query result is empty."
         
+        from sqlalchemy.orm import class_mapper
+        
         # Extract the class of the first entity in the result
         entity_class = type(sqlalchemy_list_result[0])
         
@@ -49,6 +97,70 @@ class AccountManagerCLI(Cmd):
             
         return table
     
+    def emit(self, **fields) -> None:
+        # JSON-lines output: one object per row or message, tagged with the script line
+        # Timestamps and decimals come back as objects, written as text
+        print(json.dumps({"line": self.line_number, **fields}, default=str))
+    
+    def show_result(self, result) -> None:
+        if not self.json_lines:
+            print(AccountManagerCLI.query_result_to_table(result))
+        elif not result:
+            self.emit(message="Query result is empty.")
+        else:
+            self.emit(row=dict(result))
+    
+    def show_page(self, page: list) -> None:
+        if not self.json_lines:
+            print(AccountManagerCLI.query_list_result_to_table(page))
+            return
+        
+        from sqlalchemy.orm import class_mapper
+        
+        for entity in page:
+            self.emit(row={col.key: getattr(entity, col.key) for col in class_mapper(type(entity)).columns})
+    
+    def show_message(self, message: str) -> None:
+        if self.json_lines:
+            self.emit(message=message)
+        else:
+            print(message)
+    
+    def show_error(self, error: str) -> None:
+        # Marks the command as failed, a script stops there
+        self.failed = True
+        
+        if self.json_lines:
+            self.emit(error=error)
+        else:
+            print(error)
+    
+    def default(self, line):
+        self.show_error(f"*** Unknown syntax: {line}")
+    
+    def print_pages(self, fetch_page, after_id: int = None, limit: int = None, page_size: int = PAGE_SIZE) -> None:
+        # Walks the result with keyset pagination, only one page is held at a time
+        printed = 0
+        
+        while limit is None or printed < limit:
+            size = page_size if limit is None else min(page_size, limit - printed)
+            page = fetch_page(after_id=after_id, limit=size)
+            
+            if not page:
+                break
+            
+            self.show_page(page)
+            printed += len(page)
+            after_id = page[-1].id
+            
+            if len(page) < size:
+                return
+        
+        if printed == 0:
+            self.show_message("Query result is empty.")
+        elif limit is not None:
+            self.show_message(f"Next page: --after_id {after_id}")
+    
     def do_get(self, args):
         """
         Get a specific account or client by ID.
@@ -67,44 +179,47 @@ class AccountManagerCLI(Cmd):
         try:
             parsed_args = parser.parse_args(shlex.split(args))
         except SystemExit as e:
-            print("Invalid usage. Type 'help get' for details.")
+            self.show_error("Invalid usage. Type 'help get' for details.")
             return e
         
         if parsed_args.entity == "client":
             query_result = self.client.get_client(client_id=parsed_args.id)
-            print(AccountManagerCLI.query_result_to_table(query_result))
+            self.show_result(query_result)
             
         elif parsed_args.entity == "account":
             query_result = self.account.get_account(account_id=parsed_args.id)
-            print(AccountManagerCLI.query_result_to_table(query_result))
+            self.show_result(query_result)
         
 
     def do_list(self, args):
         """
         List accounts or clients with optional filters.
-        Usage: list account
-               list client
+        Results are fetched page by page, ordered by ID.
+        Usage: list account [--after_id <id>] [--limit <limit>]
+               list client [--after_id <id>] [--limit <limit>]
         """
         parser = argparse.ArgumentParser(prog='list', add_help=False)
         subparsers = parser.add_subparsers(dest='entity', help='Entity to list (account or client)')
         
-        subparsers.add_parser('account')
-        subparsers.add_parser('client')
+        account_parser = subparsers.add_parser('account')
+        client_parser = subparsers.add_parser('client')
+        
+        for entity_parser in (account_parser, client_parser):
+            entity_parser.add_argument('--after_id', '--after-id', dest='after_id', type=int, help='Start after this ID')
+            entity_parser.add_argument('--limit', type=int, help='Maximum number of rows to show')
         
         try:
             parsed_args = parser.parse_args(shlex.split(args))
         except SystemExit as e:
             # Catch argparse help or error and print usage without exiting
-            print("Invalid usage. Type 'help list' for details.")
+            self.show_error("Invalid usage. Type 'help list' for details.")
             return e
         
         if parsed_args.entity == "client":
-            query_result = self.client.list_client()
-            print(AccountManagerCLI.query_list_result_to_table(query_result))
+            self.print_pages(self.client.list_client, parsed_args.after_id, parsed_args.limit)
             
         elif parsed_args.entity == "account":
-            query_result = self.account.list_account()
-            print(AccountManagerCLI.query_list_result_to_table(query_result))
+            self.print_pages(self.account.list_account, parsed_args.after_id, parsed_args.limit)
         
 
     def do_create(self, args):
@@ -127,18 +242,18 @@ class AccountManagerCLI(Cmd):
         try:
             parsed_args = parser.parse_args(shlex.split(args))
         except SystemExit as e:
-            print("Invalid usage. Type 'help create' for details.")
+            self.show_error("Invalid usage. Type 'help create' for details.")
             return e
         
         if parsed_args.entity == "account":
             new_account = self.account.create_account(owner_id=parsed_args.owner_id, password=parsed_args.password)
-            print("Account created:")
-            print(AccountManagerCLI.query_result_to_table(new_account))
+            self.show_message("Account created:")
+            self.show_result(new_account)
             
         elif parsed_args.entity == "client":
             new_client = self.client.create_client(cpf=parsed_args.cpf, complete_name=parsed_args.complete_name)
-            print("Client created:")
-            print(AccountManagerCLI.query_result_to_table(new_client))
+            self.show_message("Client created:")
+            self.show_result(new_client)
 
     def do_update(self, args):
         """
@@ -162,7 +277,7 @@ class AccountManagerCLI(Cmd):
         try:
             parsed_args = parser.parse_args(shlex.split(args))
         except SystemExit as e:
-            print("Invalid usage. Type 'help update' for details.")
+            self.show_error("Invalid usage. Type 'help update' for details.")
             return e
         
         if parsed_args.entity == "account":
@@ -171,8 +286,8 @@ class AccountManagerCLI(Cmd):
                 owner_id=parsed_args.owner_id,
                 password=parsed_args.password
             )
-            print("Account updated:")
-            print(AccountManagerCLI.query_result_to_table(updated_account))
+            self.show_message("Account updated:")
+            self.show_result(updated_account)
             
         elif parsed_args.entity == "client":
             updated_client = self.client.update_client(
@@ -180,8 +295,8 @@ class AccountManagerCLI(Cmd):
                 cpf=parsed_args.cpf,
                 complete_name=parsed_args.complete_name
             )
-            print("Client updated:")
-            print(AccountManagerCLI.query_result_to_table(updated_client))
+            self.show_message("Client updated:")
+            self.show_result(updated_client)
 
     def do_delete(self, args):
         """
@@ -201,20 +316,200 @@ class AccountManagerCLI(Cmd):
         try:
             parsed_args = parser.parse_args(shlex.split(args))
         except SystemExit as e:
-            print("Invalid usage. Type 'help delete' for details.")
+            self.show_error("Invalid usage. Type 'help delete' for details.")
             return e
         
         if parsed_args.entity == "account":
             deleted_account = self.account.delete_account(account_id=parsed_args.id)
-            print("Account deleted:")
-            print(AccountManagerCLI.query_result_to_table(deleted_account))
+            self.show_message("Account deleted:")
+            self.show_result(deleted_account)
             
         elif parsed_args.entity == "client":
             deleted_client = self.client.delete_client(client_id=parsed_args.id)
-            print("Client deleted:")
-            print(AccountManagerCLI.query_result_to_table(deleted_client))
+            self.show_message("Client deleted:")
+            self.show_result(deleted_client)
+    
+    def do_import(self, args):
+        """
+        Import clients or accounts from a CSV or Parquet file in one atomic step.
+        The whole file is rejected if any row fails validation.
+        Usage: import client <path>
+               import account <path>
+        """
+        parser = argparse.ArgumentParser(prog='import', add_help=False)
+        parser.add_argument('entity', choices=['client', 'account'], help='Entity to import (client or account)')
+        parser.add_argument('path', help='CSV or Parquet file to import')
+        
+        try:
+            parsed_args = parser.parse_args(shlex.split(args))
+        except SystemExit as e:
+            self.show_error("Invalid usage. Type 'help import' for details.")
+            return e
+        
+        # Resolved here so a daemon reads the same file
+        path = os.path.realpath(parsed_args.path)
+        
+        if parsed_args.entity == "client":
+            imported = self.bulk.import_clients(path=path)
+            
+        elif parsed_args.entity == "account":
+            imported = self.bulk.import_accounts(path=path)
+            
+        self.show_message(f"Imported {imported} {parsed_args.entity} row(s) from {path}")
+    
+    def do_changes(self, args):
+        """
+        Show what either system changed since the last call, oldest first.
+        The first call only marks where the feed starts, unless --after is given.
+        Usage: changes [--after <seq>] [--limit <limit>]
+        """
+        parser = argparse.ArgumentParser(prog='changes', add_help=False)
+        parser.add_argument('--after', type=int, help='Show the changes after this sequence number')
+        parser.add_argument('--limit', type=int, help='Maximum number of changes to show')
+        
+        try:
+            parsed_args = parser.parse_args(shlex.split(args))
+        except SystemExit as e:
+            self.show_error("Invalid usage. Type 'help changes' for details.")
+            return e
+        
+        if parsed_args.after is not None:
+            self.changes.seek(parsed_args.after)
+        
+        changes = self.changes.poll(parsed_args.limit)
+        
+        if not changes:
+            self.show_message(f"No changes after sequence {self.changes.position}.")
+            return
+        
+        if self.json_lines:
+            for change in changes:
+                self.emit(row=change)
+            return
+        
+        table = PrettyTable()
+        table.field_names = list(changes[0].keys())
+        
+        for change in changes:
+            table.add_row(list(change.values()))
+        
+        print(table)
+    
+    def do_stats(self, args):
+        """
+        Show latency percentiles per operation and phase (lock_wait, lock_hold, query, rollback, bcrypt)
+        and the depth of the write-lock queue, and the row cache counters when it is enabled.
+        With a daemon, the statistics are the daemon's, which runs every operation.
+        Usage: stats [--json] [--output <path>] [--reset]
+        """
+        parser = argparse.ArgumentParser(prog='stats', add_help=False)
+        parser.add_argument('--json', action='store_true', help='Print the statistics as JSON')
+        parser.add_argument('--output', help='Write the statistics as JSON to this file')
+        parser.add_argument('--reset', action='store_true', help='Clear the statistics after showing them')
+        
+        try:
+            parsed_args = parser.parse_args(shlex.split(args))
+        except SystemExit as e:
+            self.show_error("Invalid usage. Type 'help stats' for details.")
+            return e
+        
+        snapshot = self.stats.snapshot()
+        
+        if self.scheduler is not None:
+            snapshot["write_queue"] = self.scheduler.metrics()
+        
+        if self.row_cache is not None:
+            try:
+                snapshot["row_cache"] = self.row_cache.metrics()
+            except ValueError:
+                pass  # The daemon runs without a row cache
+        
+        if parsed_args.output:
+            with open(parsed_args.output, "w") as output_file:
+                json.dump(snapshot, output_file, indent=2)
+            self.show_message(f"Statistics written to {parsed_args.output}")
+        
+        elif self.json_lines:
+            self.emit(stats=snapshot)
+        
+        elif parsed_args.json:
+            print(json.dumps(snapshot, indent=2))
+        
+        else:
+            write_queue = snapshot.pop("write_queue", None)
+            row_cache = snapshot.pop("row_cache", None)
+            
+            if write_queue is not None:
+                print(
+                    f"Write queue: depth {write_queue['queue_depth']}, max {write_queue['max_queue_depth']}, "
+                    f"mean {write_queue['mean_queue_depth']}, acquired {write_queue['acquired']}, aged {write_queue['aged']}"
+                )
+            
+            if row_cache is not None:
+                print(
+                    f"Row cache: {row_cache['entries']} entries, {row_cache['hits']} hits, {row_cache['misses']} misses "
+                    f"(hit rate {row_cache['hit_rate']}), {row_cache['invalidations']} invalidations"
+                )
+            
+            if not snapshot:
+                print("No operations recorded yet.")
+            else:
+                table = PrettyTable()
+                table.field_names = ["operation", "phase", "count", "p50 (ms)", "p95 (ms)", "p99 (ms)", "max (ms)"]
+                
+                for operation, phases in snapshot.items():
+                    for phase, summary in phases.items():
+                        table.add_row([
+                            operation, phase, summary["count"],
+                            summary["p50_ms"], summary["p95_ms"], summary["p99_ms"], summary["max_ms"]
+                        ])
+                
+                print(table)
+        
+        if parsed_args.reset:
+            self.stats.reset()
     
     def do_exit(self, arg):
         'Exit the Account Manager CLI'
-        print('Goodbye!')
+        self.show_message('Goodbye!')
+        return True
+    
+    def run_script(self, lines: Iterable[str], transaction: bool = False) -> bool:
+        """
+        Run commands one per line, skipping blank lines and # comments, until the first
+        one that fails or exit. With ``transaction``, every command runs in one database
+        transaction, committed only if all of them succeed. Returns whether they did.
+        """
+        script_transaction = nullcontext()
+        
+        if transaction:
+            from database.operations import connection_manager
+            script_transaction = connection_manager.transaction()
+        
+        with script_transaction as database_transaction:
+            for self.line_number, line in enumerate(lines, start=1):
+                line = line.strip()
+                
+                if not line or line.startswith("#"):
+                    continue
+                
+                self.failed = False
+                
+                try:
+                    stop = self.onecmd(line)
+                except Exception as e:
+                    self.show_error(str(e))
+                
+                if self.failed:
+                    if database_transaction is not None:
+                        if database_transaction.is_active:
+                            database_transaction.rollback()  # A failed write already ended it
+                        self.show_message(f"Script stopped at line {self.line_number}, every change was rolled back.")
+                    else:
+                        self.show_message(f"Script stopped at line {self.line_number}.")
+                    return False
+                
+                if stop is True:
+                    break
+        
         return True
\ No newline at end of file
@@ -0,0 +1,189 @@
+import os
+from typing import List
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from database.changes import record_selected
+from database.operations import OperationHandler, write_operation
+
+# DuckDB table functions reading each supported file type. CSV columns are read as
+# text and cast below, so values such as CPFs keep their leading zeros.
+READERS = {
+    ".csv": "read_csv({path}, header = true, all_varchar = true)",
+    ".parquet": "read_parquet({path})",
+}
+
+STAGING_TABLE = "bulk_import_staging"
+
+# Columns accepted for each entity and the type they are cast to
+CLIENT_COLUMNS = {"id": "BIGINT", "cpf": "VARCHAR", "complete_name": "VARCHAR", "version": "INTEGER"}
+ACCOUNT_COLUMNS = {"id": "BIGINT", "owner": "BIGINT", "balance": "BIGINT", "password": "VARCHAR", "version": "INTEGER"}
+TRANSACTION_COLUMNS = {
+    "id": "BIGINT",
+    "timestamp": "TIMESTAMP",
+    "transaction_type": "VARCHAR",
+    "amount": "BIGINT",
+    "payer": "BIGINT",
+    "receiver": "BIGINT",
+    "version": "INTEGER",
+}
+
+def sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+class BulkLoader(OperationHandler):
+    """Loads clients, accounts or transactions from CSV or Parquet files in one atomic step.
+
+    Files are read by DuckDB's native readers into a staging table, validated with
+    set-based queries and written with a single INSERT ... SELECT, all inside one write
+    operation. Rows may carry their own ``id`` so the references of a migrated ledger stay
+    valid; otherwise ids come from the usual sequences.
+    """
+    # Write operations ____________________________________________________________
+    @write_operation
+    def import_clients(self, path: str, db_session: Session = None) -> int:
+        columns = self._stage(path, CLIENT_COLUMNS, ["cpf", "complete_name"], db_session)
+
+        self._validate(self._id_checks("clients", columns) + [
+            ("have no CPF", "s.cpf IS NULL OR trim(s.cpf) = ''"),
+            ("have no complete name", "s.complete_name IS NULL OR trim(s.complete_name) = ''"),
+            ("repeat a CPF of the file", f"s.cpf IN (SELECT cpf FROM {STAGING_TABLE} GROUP BY cpf HAVING count(*) > 1)"),
+            ("use a CPF already registered", "s.cpf IN (SELECT cpf FROM clients)"),
+        ], db_session)
+
+        return self._insert("clients", "client_id_seq", columns, {
+            "cpf": "s.cpf",
+            "complete_name": "s.complete_name",
+            "version": self._optional(columns, "version", "1"),
+        }, db_session)
+
+    @write_operation
+    def import_accounts(self, path: str, db_session: Session = None) -> int:
+        """Balances are imported as they are; passwords must already be bcrypt hashes."""
+        columns = self._stage(path, ACCOUNT_COLUMNS, ["owner", "password"], db_session)
+
+        self._validate(self._id_checks("bank_accounts", columns) + [
+            ("have no owner", "s.owner IS NULL"),
+            ("reference an owner that does not exist", "s.owner NOT IN (SELECT id FROM clients)"),
+            ("have no password hash", "s.password IS NULL OR s.password = ''"),
+            ("have a negative balance", "s.balance < 0" if "balance" in columns else "false"),
+        ], db_session)
+
+        return self._insert("bank_accounts", "bkacc_id_seq", columns, {
+            "owner": "s.owner",
+            "balance": self._optional(columns, "balance", "0"),
+            "password": "s.password",
+            "version": self._optional(columns, "version", "1"),
+        }, db_session)
+
+    @write_operation
+    def import_transactions(self, path: str, db_session: Session = None) -> int:
+        """Transactions are imported as ledger history, account balances are left untouched."""
+        columns = self._stage(path, TRANSACTION_COLUMNS, ["timestamp", "transaction_type", "amount", "payer", "receiver"], db_session)
+
+        self._validate(self._id_checks("transactions", columns) + [
+            ("have no timestamp", "s.timestamp IS NULL"),
+            ("have an invalid transaction type", "s.transaction_type IS NULL OR s.transaction_type NOT IN ('withdrawal', 'deposit', 'transfer')"),
+            ("have an amount that is not positive", "s.amount IS NULL OR s.amount <= 0"),
+            ("miss the payer their type requires", "s.transaction_type IN ('withdrawal', 'transfer') AND s.payer IS NULL"),
+            ("miss the receiver their type requires", "s.transaction_type IN ('deposit', 'transfer') AND s.receiver IS NULL"),
+            ("reference a payer account that does not exist", "s.payer IS NOT NULL AND s.payer NOT IN (SELECT id FROM bank_accounts)"),
+            ("reference a receiver account that does not exist", "s.receiver IS NOT NULL AND s.receiver NOT IN (SELECT id FROM bank_accounts)"),
+        ], db_session)
+
+        return self._insert("transactions", "transaction_id_seq", columns, {
+            "timestamp": "s.timestamp",
+            "transaction_type": "s.transaction_type",
+            "amount": "s.amount",
+            "payer": "s.payer",
+            "receiver": "s.receiver",
+            "version": self._optional(columns, "version", "1"),
+        }, db_session)
+
+    # Import steps ________________________________________________________________
+    def _stage(self, path: str, accepted: dict, required: List[str], db_session: Session) -> set:
+        extension = os.path.splitext(path)[1].lower()
+
+        if extension not in READERS:
+            raise ValueError(f"Unsupported file type '{extension}', expected one of: {', '.join(READERS)}")
+
+        if not os.path.isfile(path):
+            raise ValueError(f"File not found: {path}")
+
+        reader = READERS[extension].format(path=sql_string(os.path.realpath(path)))
+
+        try:
+            found = [row[0] for row in db_session.execute(text(f"DESCRIBE SELECT * FROM {reader}"))]
+
+            missing = [column for column in required if column not in found]
+            if missing:
+                raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+            columns = [column for column in found if column in accepted]
+            casts = ", ".join(f'CAST("{column}" AS {accepted[column]}) AS "{column}"' for column in columns)
+
+            db_session.execute(text(f"CREATE OR REPLACE TEMP TABLE {STAGING_TABLE} AS SELECT {casts} FROM {reader}"))
+
+        except DBAPIError as e:
+            raise ValueError(f"Could not read {path}: {e.orig}") from e
+
+        return set(columns)
+
+    def _validate(self, checks: List[tuple], db_session: Session) -> None:
+        # Each check counts the offending rows of the whole file in one query
+        problems = []
+
+        for message, condition in checks:
+            count = db_session.execute(text(f"SELECT count(*) FROM {STAGING_TABLE} AS s WHERE {condition}")).scalar()
+            if count:
+                problems.append(f"{count} row(s) {message}")
+
+        if problems:
+            raise ValueError("Import rejected: " + "; ".join(problems))
+
+    def _id_checks(self, table: str, columns: set) -> List[tuple]:
+        if "id" not in columns:
+            return []
+
+        return [
+            ("have no id", "s.id IS NULL"),
+            ("repeat an id of the file", f"s.id IN (SELECT id FROM {STAGING_TABLE} GROUP BY id HAVING count(*) > 1)"),
+            (f"reuse an id already present in {table}", f"s.id IN (SELECT id FROM {table})"),
+        ]
+
+    def _optional(self, columns: set, column: str, default: str) -> str:
+        return f"coalesce(s.{column}, {default})" if column in columns else default
+
+    def _insert(self, table: str, sequence: str, columns: set, values: dict, db_session: Session) -> int:
+        if "id" not in columns:
+            # Drawn before inserting, so the change log can name the new rows
+            db_session.execute(text(f"ALTER TABLE {STAGING_TABLE} ADD COLUMN id BIGINT"))
+            db_session.execute(text(f"UPDATE {STAGING_TABLE} SET id = nextval('{sequence}')"))
+
+        values = {"id": "s.id", **values}
+
+        db_session.execute(text(
+            f"INSERT INTO {table} ({', '.join(values)}) "
+            f"SELECT {', '.join(values.values())} FROM {STAGING_TABLE} AS s"
+        ))
+        record_selected(db_session, table, "insert", f"SELECT s.id AS id, {values['version']} AS version FROM {STAGING_TABLE} AS s")
+
+        if "id" in columns:
+            self._advance_sequence(table, sequence, db_session)
+
+        count = db_session.execute(text(f"SELECT count(*) FROM {STAGING_TABLE}")).scalar()
+        db_session.execute(text(f"DROP TABLE {STAGING_TABLE}"))
+
+        return count
+
+    def _advance_sequence(self, table: str, sequence: str, db_session: Session) -> None:
+        # Explicit ids bypass the sequence. DuckDB has no setval, so values are drawn
+        # until the sequence is past the largest id and later inserts cannot collide.
+        next_value = db_session.execute(text(f"SELECT nextval('{sequence}')")).scalar()
+        max_id = db_session.execute(text(f"SELECT coalesce(max(id), 0) FROM {table}")).scalar()
+
+        if next_value < max_id:
+            db_session.execute(
+                text(f"SELECT max(nextval('{sequence}')) FROM range(:count)"),
+                {"count": max_id - next_value}
+            )
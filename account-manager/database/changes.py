@@ -0,0 +1,55 @@
+from datetime import datetime, timezone
+from typing import Iterable
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from database.table_model import ChangeLog
+
+CHANGE_LOG = ChangeLog.__table__
+
+# Entity recorded for each table followed by the change log
+ENTITIES = {"clients": "client", "bank_accounts": "account", "transactions": "transaction"}
+
+def record_changes(db_session: Session, table: str, operation: str, rows: Iterable[tuple]) -> None:
+    """
+    Append ``(id, version)`` rows of ``table`` to the change log, in the caller's transaction.
+    """
+    changed_at = datetime.now(timezone.utc)
+    values = [
+        {"entity": ENTITIES[table], "entity_id": entity_id, "version": version, "operation": operation, "changed_at": changed_at}
+        for entity_id, version in rows
+    ]
+
+    if values:
+        db_session.execute(insert(CHANGE_LOG), values)
+
+def record_selected(db_session: Session, table: str, operation: str, rows_query: str) -> None:
+    """
+    Same as ``record_changes`` for the ``id, version`` rows of a query, so bulk writes stay set-based.
+    """
+    db_session.execute(
+        text(
+            f"INSERT INTO {CHANGE_LOG.name} (seq, entity, entity_id, version, operation, changed_at) "
+            f"SELECT nextval('change_log_seq'), :entity, id, version, :operation, :changed_at FROM ({rows_query})"
+        ),
+        {"entity": ENTITIES[table], "operation": operation, "changed_at": datetime.now(timezone.utc)}
+    )
+
+def record_flush(session: Session, flush_context) -> None:
+    # Session "after_flush" listener: ORM writes are recorded here, in the same
+    # transaction, while Core statements call record_changes themselves
+    changes = {}
+
+    for operation, objects in (("insert", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for instance in objects:
+            table = getattr(instance, "__tablename__", None)
+
+            if table not in ENTITIES:
+                continue
+            if operation == "update" and not session.is_modified(instance, include_collections=False):
+                continue
+
+            changes.setdefault((table, operation), []).append((instance.id, instance.version))
+
+    for (table, operation), rows in changes.items():
+        record_changes(session.connection(), table, operation, rows)
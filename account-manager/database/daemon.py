@@ -0,0 +1,141 @@
+import os
+import pickle
+import threading
+from multiprocessing.connection import Listener, Client
+from typing import TYPE_CHECKING
+
+from database.settings import DB_FILE
+
+if TYPE_CHECKING:
+    from filelock import FileLock
+
+DAEMON_SOCKET = os.getenv("DATABASE_SOCKET", f"{DB_FILE}.sock")
+
+class DatabaseDaemon:
+    """Single writer that owns the DuckDB connection for every system.
+
+    Handler calls arrive over a local Unix socket as ``(handler, method, args, kwargs)``
+    and run in this process against one persistent connection. Writes are serialized
+    by an in-process lock instead of the cross-process file lock, which the daemon
+    keeps for its whole lifetime so no CLI opens the database file behind its back.
+    With ``concurrent=True`` writes are not serialized at all: each client thread
+    writes on its own connection and DuckDB resolves conflicting rows.
+    """
+    def __init__(self, handler_factories: dict, filelock: "FileLock", address: str = DAEMON_SOCKET, concurrent: bool = False) -> None:
+        # Imported here, the clients only need RemoteHandler and never open the database
+        from database.operations import NO_WRITE_LOCK
+        
+        self.address = address
+        self.filelock = filelock
+        self.write_lock = NO_WRITE_LOCK if concurrent else threading.Lock()
+        self.handlers = {name: factory(self.write_lock) for name, factory in handler_factories.items()}
+
+    def serve_forever(self) -> None:
+        from database.operations import connection_manager
+        
+        connection_manager.configure(persistent=True)
+
+        if os.path.exists(self.address):
+            os.unlink(self.address)  # Left behind by a daemon that did not shut down cleanly
+
+        with self.filelock:
+            old_umask = os.umask(0o177)  # Socket only reachable by the owner
+            try:
+                listener = Listener(self.address, family="AF_UNIX")
+            finally:
+                os.umask(old_umask)
+
+            # Background work, such as the spool's drainer, only starts once the daemon
+            # owns the database and its persistent connection
+            workers = [handler for handler in self.handlers.values() if hasattr(handler, "start")]
+            for worker in workers:
+                worker.start()
+
+            print(f"Database daemon listening on {self.address}")
+
+            try:
+                while True:
+                    connection = listener.accept()
+                    threading.Thread(target=self._serve_client, args=(connection,), daemon=True).start()
+
+            except KeyboardInterrupt:
+                print("Shutting down database daemon...")
+
+            finally:
+                listener.close()
+                for worker in workers:
+                    worker.stop()
+                connection_manager.dispose()
+
+    def _serve_client(self, connection) -> None:
+        with connection:
+            while True:
+                try:
+                    handler_name, method_name, args, kwargs = connection.recv()
+                except (EOFError, OSError):
+                    return
+
+                try:
+                    result = ("ok", self._dispatch(handler_name, method_name, args, kwargs))
+                except Exception as e:
+                    result = ("error", e)
+
+                try:
+                    connection.send(result)
+                except (pickle.PicklingError, TypeError, AttributeError):
+                    connection.send(("error", RuntimeError(f"{type(result[1]).__name__}: {result[1]}")))
+
+    def _dispatch(self, handler_name: str, method_name: str, args: tuple, kwargs: dict):
+        handler = self.handlers.get(handler_name)
+
+        if handler is None:
+            raise ValueError(f"Unknown handler '{handler_name}'")
+
+        if method_name.startswith("_") or not callable(getattr(handler, method_name, None)):
+            raise ValueError(f"Unknown operation '{handler_name}.{method_name}'")
+
+        return getattr(handler, method_name)(*args, **kwargs)
+
+class RemoteHandler:
+    """Client side stand-in for a handler served by ``DatabaseDaemon``.
+
+    Exposes the same public methods as the handler it names, so the CLIs can use
+    it in place of a local ``AccountHandler``, ``ClientHandler`` or ``TransactionHandler``.
+    """
+    def __init__(self, handler_name: str, address: str = DAEMON_SOCKET) -> None:
+        self.handler_name = handler_name
+        self.address = address
+        self._connection = None
+        self._mutex = threading.Lock()
+
+    def __getattr__(self, method_name: str):
+        if method_name.startswith("_"):
+            raise AttributeError(method_name)
+
+        def remote_call(*args, **kwargs):
+            return self._call(method_name, args, kwargs)
+
+        remote_call.__name__ = method_name
+        return remote_call
+
+    def _call(self, method_name: str, args: tuple, kwargs: dict):
+        with self._mutex:
+            if self._connection is None:
+                self._connection = Client(self.address, family="AF_UNIX")
+
+            try:
+                self._connection.send((self.handler_name, method_name, args, kwargs))
+                status, payload = self._connection.recv()
+            except (EOFError, OSError):
+                self.close()
+                raise ConnectionError(f"Lost connection to database daemon at {self.address}")
+
+        if status == "error":
+            raise payload
+
+        return payload
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,52 @@
+from typing import List
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from database.changes import CHANGE_LOG
+from database.operations import OperationHandler, read_operation
+
+class ChangeLogHandler(OperationHandler):
+    # Read operations _____________________________________________________________
+    @read_operation
+    def changes_after(self, after: int, limit: int = None, db_session: Session = None) -> List[dict]:
+        query = select(CHANGE_LOG).where(CHANGE_LOG.c.seq > after).order_by(CHANGE_LOG.c.seq)
+
+        if limit is not None:
+            query = query.limit(limit)
+
+        return [dict(row._mapping) for row in db_session.execute(query)]
+
+    @read_operation
+    def latest_sequence(self, db_session: Session = None) -> int:
+        return db_session.execute(select(func.coalesce(func.max(CHANGE_LOG.c.seq), 0))).scalar()
+
+class ChangeFeed:
+    """Subscriber to the changes both systems record in the change log.
+
+    Each ``poll`` returns the changes after the last sequence number it has seen, so
+    consumers refresh what changed instead of rescanning tables. Without ``after`` the
+    feed starts at the current end of the log, on its first poll. ``source`` is a
+    ``ChangeLogHandler`` or the daemon's remote one; the position stays on this side.
+
+    Sequence numbers are drawn as rows are written, so they follow commit order as long
+    as writes are serialized by the write lock. A ``--concurrent`` daemon may commit a
+    change after a later one was polled.
+    """
+    def __init__(self, source: ChangeLogHandler, after: int = None) -> None:
+        self.source = source
+        self.position = after
+
+    def poll(self, limit: int = None) -> List[dict]:
+        if self.position is None:
+            self.position = self.source.latest_sequence()
+            return []
+
+        changes = self.source.changes_after(self.position, limit)
+
+        if changes:
+            self.position = changes[-1]["seq"]
+
+        return changes
+
+    def seek(self, after: int) -> None:
+        self.position = after
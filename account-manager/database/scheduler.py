@@ -0,0 +1,179 @@
+import json
+import threading
+import time
+import uuid
+from filelock import FileLock, Timeout
+
+# Queue positions, lower goes first
+TRANSACTION_PRIORITY = 0
+MAINTENANCE_PRIORITY = 1
+
+PRIORITY_NAMES = {TRANSACTION_PRIORITY: "transaction", MAINTENANCE_PRIORITY: "maintenance"}
+
+# Waiters refresh their entry this often; entries not refreshed for STALE_AFTER
+# belong to a process that died while waiting and are dropped
+HEARTBEAT_INTERVAL = 1.0
+STALE_AFTER = 10.0
+
+class LockScheduler:
+    """Orders the processes waiting for the database write lock.
+
+    Waiters take a ticket in a small queue file next to the lock file, shared by both
+    systems. The write lock is only tried by the head of the queue: the oldest ticket
+    of the most urgent priority. Transactions go before maintenance writes, but a
+    maintenance write that has waited ``aging`` seconds competes as a transaction, so
+    a steady flow of transactions cannot starve it. Waiting longer than the lock's
+    own timeout raises ``filelock.Timeout`` as before.
+    """
+    def __init__(self, filelock: FileLock, aging: float = 2.0, poll_interval: float = 0.005) -> None:
+        self.filelock = filelock
+        self.aging = aging
+        self.poll_interval = poll_interval
+        self.queue_file = f"{filelock.lock_file}.queue"
+        self._queue_lock = FileLock(f"{self.queue_file}.lock")
+        self._mutex = threading.Lock()
+        self._depth_total = 0
+        self._depth_samples = 0
+        self._max_depth = 0
+        self._acquired = {name: 0 for name in PRIORITY_NAMES.values()}
+        self._aged = 0
+
+    def with_priority(self, priority: int) -> "ScheduledLock":
+        return ScheduledLock(self, priority)
+
+    # Queue file __________________________________________________________________
+    def _read_queue(self) -> dict:
+        try:
+            with open(self.queue_file) as queue_file:
+                return json.load(queue_file)
+        except (FileNotFoundError, ValueError):
+            return {"next_seq": 0, "waiters": {}}
+
+    def _write_queue(self, queue: dict) -> None:
+        with open(self.queue_file, "w") as queue_file:
+            json.dump(queue, queue_file)
+
+    def _enqueue(self, priority: int) -> str:
+        ticket = uuid.uuid4().hex
+        now = time.time()
+
+        with self._queue_lock:
+            queue = self._read_queue()
+            queue["waiters"][ticket] = {"priority": priority, "seq": queue["next_seq"], "enqueued": now, "heartbeat": now}
+            queue["next_seq"] += 1
+            self._write_queue(queue)
+            depth = len(queue["waiters"])
+
+        with self._mutex:
+            self._depth_total += depth
+            self._depth_samples += 1
+            self._max_depth = max(self._max_depth, depth)
+
+        return ticket
+
+    def _dequeue(self, ticket: str) -> None:
+        with self._queue_lock:
+            queue = self._read_queue()
+            if queue["waiters"].pop(ticket, None) is not None:
+                self._write_queue(queue)
+
+    def _effective_priority(self, waiter: dict, now: float) -> int:
+        if now - waiter["enqueued"] >= self.aging:
+            return TRANSACTION_PRIORITY
+        return waiter["priority"]
+
+    def _is_head(self, ticket: str) -> tuple:
+        # Returns (is head of the queue, was promoted by aging)
+        now = time.time()
+
+        with self._queue_lock:
+            queue = self._read_queue()
+            waiters = queue["waiters"]
+            changed = False
+
+            for other in [other for other, waiter in waiters.items() if now - waiter["heartbeat"] > STALE_AFTER and other != ticket]:
+                del waiters[other]
+                changed = True
+
+            own = waiters.get(ticket)
+            if own is not None and now - own["heartbeat"] > HEARTBEAT_INTERVAL:
+                own["heartbeat"] = now
+                changed = True
+
+            if changed:
+                self._write_queue(queue)
+
+        if own is None:
+            return True, False  # Dropped as stale after a long pause, do not wait behind others
+
+        head = min(waiters, key=lambda other: (self._effective_priority(waiters[other], now), waiters[other]["seq"]))
+        return head == ticket, own["priority"] != self._effective_priority(own, now)
+
+    # Locking _____________________________________________________________________
+    def acquire(self, priority: int = MAINTENANCE_PRIORITY) -> None:
+        if self.filelock.is_locked:
+            self.filelock.acquire()  # Already held by this thread, only counts the nesting
+            return
+
+        timeout = self.filelock.timeout
+        deadline = None if timeout < 0 else time.monotonic() + timeout
+        ticket = self._enqueue(priority)
+
+        try:
+            while True:
+                is_head, aged = self._is_head(ticket)
+
+                if is_head:
+                    try:
+                        self.filelock.acquire(timeout=0)
+                    except Timeout:
+                        pass
+                    else:
+                        with self._mutex:
+                            self._acquired[PRIORITY_NAMES.get(priority, str(priority))] += 1
+                            self._aged += aged
+                        return
+
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise Timeout(self.filelock.lock_file)
+
+                time.sleep(self.poll_interval)
+
+        finally:
+            self._dequeue(ticket)
+
+    def release(self) -> None:
+        self.filelock.release()
+
+    def queue_depth(self) -> int:
+        with self._queue_lock:
+            return len(self._read_queue()["waiters"])
+
+    def metrics(self) -> dict:
+        with self._mutex:
+            return {
+                "queue_depth": self.queue_depth(),
+                "max_queue_depth": self._max_depth,
+                "mean_queue_depth": round(self._depth_total / self._depth_samples, 2) if self._depth_samples else 0,
+                "acquired": dict(self._acquired),
+                "aged": self._aged,
+            }
+
+class ScheduledLock:
+    """The scheduler's write lock at one priority, used where handlers expect a FileLock."""
+    def __init__(self, scheduler: LockScheduler, priority: int) -> None:
+        self.scheduler = scheduler
+        self.priority = priority
+
+    def acquire(self) -> None:
+        self.scheduler.acquire(self.priority)
+
+    def release(self) -> None:
+        self.scheduler.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, Integer, String, ForeignKey, Enum, TIMESTAMP, Sequence
+from sqlalchemy import Column, BigInteger, Integer, String, ForeignKey, Enum, TIMESTAMP, Sequence, Index
 from sqlalchemy.orm import relationship, validates
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -6,6 +6,14 @@ from sqlalchemy.ext.declarative import declarative_base
 # Declarative ORM base
 Base = declarative_base()
 
+# Bump whenever the model changes and register the upgrade in operations.MIGRATIONS
+SCHEMA_VERSION = 4
+
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+    
+    version = Column(Integer, primary_key=True, autoincrement=False)
+
 class Client(Base):
     __tablename__ = "clients"
     
@@ -41,6 +49,12 @@ class BankAccount(Base):
     
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Account history looks transactions up by either side, reports by time
+        Index("ix_transactions_payer", "payer"),
+        Index("ix_transactions_receiver", "receiver"),
+        Index("ix_transactions_timestamp", "timestamp"),
+    )
     
     id = Column(BigInteger, Sequence("transaction_id_seq", start=1, increment=1), primary_key=True)
     timestamp = Column(TIMESTAMP, nullable=False)
@@ -79,5 +93,25 @@ class Transaction(Base):
         return value
 
 
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    
+    # Client supplied key of a create_transaction call, looked up by primary key
+    key = Column(String, primary_key=True)
+    transaction_id = Column(ForeignKey("transactions.id"), nullable=False)
+
+
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+    
+    # Appended to by every write in its own transaction, read incrementally by seq
+    seq = Column(BigInteger, Sequence("change_log_seq", start=1, increment=1), primary_key=True)
+    entity = Column(String, nullable=False)
+    entity_id = Column(BigInteger, nullable=False)
+    version = Column(Integer, nullable=True)
+    operation = Column(String, nullable=False)
+    changed_at = Column(TIMESTAMP, nullable=False)
+
+
 def get_declarative_base():
     return Base
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""Shared setup for the benchmark scripts.
+
+The ``database`` package reads ``DATABASE_PATH`` when it is imported, so every
+benchmark calls ``use_database`` before importing anything from it.
+"""
+import os
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# transaction-manager ships every handler, so benchmarks import from there
+APP_DIR = os.path.join(REPO_DIR, "transaction-manager")
+
+def use_database(db_file: str = None) -> str:
+    if db_file is None:
+        db_file = os.path.join(tempfile.mkdtemp(prefix="rs-bench-"), "bench.duckdb")
+
+    os.environ["DATABASE_PATH"] = db_file
+
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+
+    return db_file
+
+def percentile(samples: list, pct: float) -> float:
+    if not samples:
+        return 0.0
+
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(label: str, samples: list) -> str:
+    return (
+        f"{label:<36} n={len(samples):<6} "
+        f"p50={percentile(samples, 50) * 1000:8.3f}ms "
+        f"p95={percentile(samples, 95) * 1000:8.3f}ms "
+        f"p99={percentile(samples, 99) * 1000:8.3f}ms"
+    )
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
@@ -0,0 +1,119 @@
+"""Throughput of concurrent streams through AsyncHandler, by rows fetched per round trip.
+
+Usage: python benchmarks/async_streams.py [--clients N] [--streams N] [--chunks 1,100,1000] [--slow-stream S]
+
+Every stream must return every client. With small chunks, the executor threads
+change between round trips, so the run also checks that no stream leaves a
+thread unable to write: writes are sent through the same handler afterwards.
+
+"write during stream" creates a client while another thread reads a stream for
+``--slow-stream`` seconds. The write waits for the stream's read-only connection
+to close, but must not hold the write lock meanwhile: other processes would see
+the database as busy for the whole stream.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from _support import use_database, summarize
+
+use_database()
+
+from filelock import FileLock
+from database import aio
+from database.aio import AsyncHandler
+from database.client import ClientHandler
+from database.operations import LOCK_FILE, connection_manager, ensure_schema
+
+async def run_chunk(handler: ClientHandler, clients: int, streams: int, chunk: int, writes: int) -> None:
+    aio.STREAM_CHUNK = chunk
+    latencies = []
+
+    async with AsyncHandler(handler, max_concurrency=4) as async_handler:
+        async def stream():
+            start = time.perf_counter()
+            rows = [client async for client in async_handler.iter_clients(batch_size=chunk)]
+            latencies.append(time.perf_counter() - start)
+            return len(rows)
+
+        start = time.perf_counter()
+        counts = await asyncio.gather(*(stream() for _ in range(streams)))
+        elapsed = time.perf_counter() - start
+
+        if counts != [clients] * streams:
+            raise AssertionError(f"Streams returned {counts} rows, expected {clients} each")
+
+        # Would fail if a stream left its read-only connection counted on a pool thread
+        for index in range(writes):
+            await async_handler.create_client(cpf=f"9{chunk:04d}{index:06d}", complete_name="Writer")
+
+    print(summarize(f"chunk={chunk}", latencies), f"throughput={streams * clients / elapsed:10.1f} rows/s")
+
+class TimedLock:
+    """FileLock wrapper recording how long each acquisition is held."""
+    def __init__(self, filelock: FileLock) -> None:
+        self.filelock = filelock
+        self.hold_times = []
+
+    def __enter__(self):
+        self.filelock.acquire()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.hold_times.append(time.perf_counter() - self._start)
+        self.filelock.release()
+
+def run_write_during_stream(clients: int, duration: float) -> None:
+    lock = TimedLock(FileLock(LOCK_FILE, timeout=60))
+    handler = ClientHandler(lock)
+    opened = threading.Event()
+
+    def read_slowly():
+        for client in handler.iter_clients(batch_size=1):
+            opened.set()
+            time.sleep(duration / clients)
+
+    reader = threading.Thread(target=read_slowly)
+    reader.start()
+    opened.wait()
+
+    start = time.perf_counter()
+    handler.create_client(cpf="99999999999", complete_name="Writer")
+    elapsed = time.perf_counter() - start
+    reader.join()
+
+    hold = lock.hold_times[-1]
+    print(f"write during stream                  call={elapsed * 1000:9.1f}ms lock hold={hold * 1000:8.1f}ms")
+
+    if hold > duration / 2:
+        raise AssertionError("The write lock was held while waiting for the stream")
+
+def run(clients: int, streams: int, chunks: list, slow_stream: float) -> None:
+    filelock = FileLock(LOCK_FILE, timeout=60)
+    ensure_schema(filelock)
+    handler = ClientHandler(filelock)
+
+    for index in range(clients):
+        handler.create_client(cpf=f"{index:011d}", complete_name=f"Client {index}")
+
+    for chunk in chunks:
+        # Each round's writes add to the clients the next round streams
+        asyncio.run(run_chunk(handler, clients, streams, chunk, writes=8))
+        clients += 8
+
+    run_write_during_stream(clients, slow_stream)
+    connection_manager.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--streams", type=int, default=6, help="streams read at the same time")
+    parser.add_argument("--chunks", default="1,100,1000", help="comma separated STREAM_CHUNK values")
+    parser.add_argument("--slow-stream", type=float, default=2.0, help="seconds the stream read during a write takes")
+    args = parser.parse_args()
+    run(args.clients, args.streams, [int(chunk) for chunk in args.chunks.split(",")], args.slow_stream)
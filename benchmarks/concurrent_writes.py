@@ -0,0 +1,127 @@
+"""Throughput of in-process writer threads with a global write lock and with NO_WRITE_LOCK.
+
+Usage: python benchmarks/concurrent_writes.py [--threads N] [--deposits N] [--hot-accounts N] [--rounds N] [--conflict-retries N]
+
+Both modes use one persistent engine, so every thread writes on its own DuckDB
+connection. "global lock" serializes the writes as the daemon used to, "no write
+lock" lets DuckDB run them concurrently. By default each thread deposits into its
+own account; ``--hot-accounts`` makes every thread pick among that many shared
+accounts instead, so writes conflict and have to be retried.
+
+"raw duckdb" is the ceiling: the same number of threads committing one balance
+UPDATE each on their own DuckDB cursor, without SQLAlchemy or the change log. A
+deposit runs four statements and an ORM flush, all CPU bound: DuckDB releases the
+GIL while executing, so the threads only overlap on as many cores as there are.
+On a single core every mode, raw included, stays flat as threads are added.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from _support import use_database, summarize
+
+use_database()
+
+from filelock import FileLock
+from database.account import AccountHandler
+from database.client import ClientHandler
+from database.transaction import TransactionHandler
+from database.operations import LOCK_FILE, NO_WRITE_LOCK, WriteConflictError, connection_manager, ensure_schema
+from database.stats import recorder
+
+def run_raw(accounts, threads, deposits) -> None:
+    latencies = []
+
+    def worker(index):
+        # A pooled connection of its own, as each thread's session has
+        connection = connection_manager.engine.raw_connection()
+        cursor = connection.cursor()
+        for _ in range(deposits):
+            start = time.perf_counter()
+            cursor.execute("BEGIN")
+            cursor.execute("UPDATE bank_accounts SET balance = balance + 1 WHERE id = ?", [accounts[index]["id"]])
+            cursor.execute("COMMIT")
+            latencies.append(time.perf_counter() - start)
+        cursor.close()
+        connection.close()
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print(summarize("raw duckdb", latencies), f"throughput={len(latencies) / elapsed:8.1f} tx/s")
+
+def run_mode(label, write_lock, accounts, threads, deposits, hot_accounts, conflict_retries) -> None:
+    handler = TransactionHandler(write_lock)
+    if conflict_retries is not None:
+        handler.conflict_retries = conflict_retries
+    latencies = []
+    failures = []
+    recorder.reset()
+
+    def worker(index):
+        rng = random.Random(index)
+        for _ in range(deposits):
+            account = accounts[index] if hot_accounts is None else rng.choice(accounts[:hot_accounts])
+            start = time.perf_counter()
+            try:
+                handler.create_transaction(
+                    transaction_type="deposit", amount=1, payer_id=None, receiver_id=account["id"],
+                    password="benchmark", payer_version=None, receiver_version=account["version"]
+                )
+            except Exception as e:
+                failures.append(e)
+            else:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    retries = recorder.snapshot().get("TransactionHandler._apply_verified", {}).get("conflict_retry", {}).get("count", 0)
+    print(
+        summarize(label, latencies),
+        f"throughput={len(latencies) / elapsed:8.1f} tx/s retries={retries} failed={len(failures)}",
+        f"(write conflicts={sum(isinstance(e, WriteConflictError) for e in failures)})"
+    )
+
+def run(threads: int, deposits: int, hot_accounts: int, rounds: int, conflict_retries: int) -> None:
+    print(f"threads={threads} cpus={os.cpu_count()}")
+
+    connection_manager.configure(persistent=True)
+    filelock = FileLock(LOCK_FILE, timeout=60)
+    ensure_schema(filelock)
+
+    owner = ClientHandler(filelock).create_client(cpf="00000000000", complete_name="Benchmark Owner")
+    account_handler = AccountHandler(filelock, pwd_salt=rounds)
+    accounts = account_handler.create_accounts([(owner["id"], "benchmark")] * threads)
+
+    # The process owns the database for the whole run, as the daemon does
+    with filelock:
+        run_raw(accounts, threads, deposits)
+        run_mode("global lock", threading.Lock(), accounts, threads, deposits, hot_accounts, conflict_retries)
+        run_mode("no write lock", NO_WRITE_LOCK, accounts, threads, deposits, hot_accounts, conflict_retries)
+
+    connection_manager.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--deposits", type=int, default=50)
+    parser.add_argument("--hot-accounts", type=int, help="shared accounts every thread deposits into")
+    parser.add_argument("--rounds", type=int, default=4, help="bcrypt cost factor of the benchmark accounts")
+    parser.add_argument("--conflict-retries", type=int, help="retries of a write aborted by a concurrent one")
+    args = parser.parse_args()
+    run(args.threads, args.deposits, args.hot_accounts, args.rounds, args.conflict_retries)
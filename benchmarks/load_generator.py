@@ -0,0 +1,230 @@
+"""Multi-process load generator: mixed transactions and account updates on a seeded database.
+
+Usage: python benchmarks/load_generator.py [--workers N] [--operations N] [--clients N]
+       [--mix deposit=40,withdrawal=20,transaction=30,update=10] [--rounds N]
+       [--lock-timeout S] [--retry-attempts N] [--seed N] [--db PATH]
+
+A temporary DuckDB file is seeded with one account per client, then every worker
+process runs its own random mix of ``create_transaction`` deposits, withdrawals and
+transfers and ``AccountHandler.update_account`` password changes, exactly as separate
+CLI processes would. Workers remember the account versions they have seen; an update
+by another worker makes their next request on that account fail with a version
+mismatch, after which they reload the account. The report gives throughput, latency
+percentiles per operation and the rate of every outcome. ``file_conflict`` counts
+operations DuckDB refused because another process held the database file open.
+``--retry-attempts`` gives the transaction handlers a RetryPolicy, so stale versions
+are refreshed and retried inside the handler instead of by the worker.
+``--db`` must name a new file, it is seeded like the temporary one.
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from _support import use_database, summarize
+
+PASSWORD = "benchmark"
+INITIAL_BALANCE = 100000
+
+OUTCOMES = ["ok", "rejected", "version_mismatch", "lock_timeout", "file_conflict", "error"]
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+
+    for part in mix.split(","):
+        name, weight = part.split("=")
+        weights[name.strip()] = float(weight)
+
+    unknown = set(weights) - {"deposit", "withdrawal", "transaction", "update"}
+    if unknown:
+        raise ValueError(f"Unknown operations in mix: {', '.join(sorted(unknown))}")
+
+    return weights
+
+def classify(error: Exception) -> str:
+    from filelock import Timeout
+
+    if isinstance(error, Timeout):
+        return "lock_timeout"
+    if isinstance(error, ValueError):
+        return "version_mismatch" if "version mismatch" in str(error) else "rejected"
+    # DuckDB refuses to open the file while another process holds it for writing
+    if "Could not set lock" in str(error) or "Conflicting lock" in str(error):
+        return "file_conflict"
+    return "error"
+
+def seed(clients: int, rounds: int) -> None:
+    import bcrypt
+    from filelock import FileLock
+    from database.bulk import BulkLoader
+    from database.operations import LOCK_FILE, connection_manager, ensure_schema
+
+    filelock = FileLock(LOCK_FILE, timeout=60)
+    ensure_schema(filelock)
+
+    # Every account shares one hash, so seeding does not pay bcrypt per account
+    hashed = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(rounds)).decode()
+    staging_dir = tempfile.mkdtemp(prefix="rs-load-")
+    clients_file = os.path.join(staging_dir, "clients.csv")
+    accounts_file = os.path.join(staging_dir, "accounts.csv")
+
+    with open(clients_file, "w", newline="") as output:
+        writer = csv.writer(output)
+        writer.writerow(["id", "cpf", "complete_name"])
+        writer.writerows((i, f"{i:011d}", f"Load Client {i}") for i in range(1, clients + 1))
+
+    with open(accounts_file, "w", newline="") as output:
+        writer = csv.writer(output)
+        writer.writerow(["id", "owner", "balance", "password"])
+        writer.writerows((i, i, INITIAL_BALANCE, hashed) for i in range(1, clients + 1))
+
+    loader = BulkLoader(filelock)
+    loader.import_clients(clients_file)
+    loader.import_accounts(accounts_file)
+    connection_manager.dispose()
+
+def worker(db_file: str, worker_id: int, operations: int, accounts: int, mix: dict, rounds: int, lock_timeout: float, retry_attempts: int, seed_value: int, results) -> None:
+    use_database(db_file)
+    # Failed operations are counted below, keep handler output out of the report
+    sys.stdout = sys.stderr = open(os.devnull, "w")
+
+    from filelock import FileLock
+    from database.account import AccountHandler
+    from database.operations import LOCK_FILE
+    from database.retry import RetryPolicy
+    from database.transaction import TransactionHandler
+
+    filelock = FileLock(LOCK_FILE, timeout=lock_timeout)
+    account_handler = AccountHandler(filelock, pwd_salt=rounds)
+    retry_policy = RetryPolicy(attempts=retry_attempts) if retry_attempts else None
+    transaction_handler = TransactionHandler(filelock, retry_policy=retry_policy)
+
+    rng = random.Random(seed_value + worker_id)
+    names, weights = zip(*mix.items())
+    versions = {}  # Account versions this worker believes are current
+    samples = []
+
+    def version_of(account_id: int) -> int:
+        return versions.get(account_id, 1)
+
+    for _ in range(operations):
+        operation = rng.choices(names, weights)[0]
+        payer_id, receiver_id = rng.sample(range(1, accounts + 1), 2) if accounts > 1 else (1, 1)
+
+        if operation == "deposit":
+            call = lambda: transaction_handler.create_transaction(
+                transaction_type="deposit", amount=rng.randint(1, 100), payer_id=None, receiver_id=receiver_id,
+                password=PASSWORD, payer_version=None, receiver_version=version_of(receiver_id)
+            )
+            touched = [receiver_id]
+        elif operation == "withdrawal":
+            call = lambda: transaction_handler.create_transaction(
+                transaction_type="withdrawal", amount=rng.randint(1, 50), payer_id=payer_id, receiver_id=None,
+                password=PASSWORD, payer_version=version_of(payer_id), receiver_version=None
+            )
+            touched = [payer_id]
+        elif operation == "transaction":
+            call = lambda: transaction_handler.create_transaction(
+                transaction_type="transaction", amount=rng.randint(1, 50), payer_id=payer_id, receiver_id=receiver_id,
+                password=PASSWORD, payer_version=version_of(payer_id), receiver_version=version_of(receiver_id)
+            )
+            touched = [payer_id, receiver_id]
+        else:
+            call = lambda: account_handler.update_account(account_id=payer_id, password=PASSWORD)
+            touched = []
+
+        start = time.perf_counter()
+        try:
+            result = call()
+        except Exception as e:
+            outcome = classify(e)
+        else:
+            outcome = "ok"
+            if operation == "update":
+                versions[payer_id] = result["version"]
+        elapsed = time.perf_counter() - start
+
+        samples.append((operation, outcome, elapsed))
+
+        if outcome == "version_mismatch":
+            for account_id in touched:
+                try:
+                    versions[account_id] = account_handler.get_account(account_id)["version"]
+                except Exception:
+                    pass  # Retried with the old version, and reloaded again if still stale
+
+    results.put((samples, transaction_handler.retries, transaction_handler.give_ups))
+
+def report(samples: list, elapsed: float, workers: int, retries: int, give_ups: int) -> None:
+    outcomes = Counter(outcome for _, outcome, _ in samples)
+    by_operation = defaultdict(list)
+
+    for operation, outcome, latency in samples:
+        if outcome == "ok":
+            by_operation[operation].append(latency)
+
+    print(f"workers={workers} operations={len(samples)} elapsed={elapsed:.2f}s "
+          f"throughput={outcomes['ok'] / elapsed:.1f} ok/s ({len(samples) / elapsed:.1f} attempts/s)")
+
+    for operation in sorted(by_operation):
+        print(summarize(f"{operation} (ok)", by_operation[operation]))
+
+    print(summarize("all attempts", [latency for _, _, latency in samples]))
+
+    for outcome in OUTCOMES:
+        print(f"{outcome:<20} {outcomes[outcome]:>8} {outcomes[outcome] / max(1, len(samples)) * 100:7.2f}%")
+
+    print(f"handler retries={retries} give_ups={give_ups}")
+
+def run(workers: int, operations: int, clients: int, mix: dict, rounds: int, lock_timeout: float, retry_attempts: int, seed_value: int, db_file: str) -> None:
+    db_file = use_database(db_file)
+    seed(clients, rounds)
+
+    # Spawned workers start clean instead of inheriting the parent's connection state
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [
+        context.Process(
+            target=worker,
+            args=(db_file, worker_id, operations, clients, mix, rounds, lock_timeout, retry_attempts, seed_value, results)
+        )
+        for worker_id in range(workers)
+    ]
+
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+
+    samples, retries, give_ups = [], 0, 0
+    for _ in processes:
+        worker_samples, worker_retries, worker_give_ups = results.get()
+        samples.extend(worker_samples)
+        retries += worker_retries
+        give_ups += worker_give_ups
+
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"database={db_file}")
+    report(samples, elapsed, workers, retries, give_ups)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--operations", type=int, default=200, help="operations per worker")
+    parser.add_argument("--clients", type=int, default=100, help="clients seeded, each with one account")
+    parser.add_argument("--mix", default="deposit=40,withdrawal=20,transaction=30,update=10", help="relative weight of each operation")
+    parser.add_argument("--rounds", type=int, default=4, help="bcrypt cost factor of the seeded accounts and updates")
+    parser.add_argument("--lock-timeout", type=float, default=10, help="seconds a worker waits for the write lock")
+    parser.add_argument("--retry-attempts", type=int, default=0, help="version mismatch retries inside the handler")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", help="database file to use instead of a temporary one")
+    args = parser.parse_args()
+    run(args.workers, args.operations, args.clients, parse_mix(args.mix), args.rounds, args.lock_timeout, args.retry_attempts, args.seed, args.db)
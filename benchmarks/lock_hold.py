@@ -0,0 +1,98 @@
+"""Write-lock hold time of create_transaction with bcrypt inside and outside the lock.
+
+Usage: python benchmarks/lock_hold.py [--threads N] [--deposits N] [--rounds N] [--persistent]
+
+Every thread deposits into its own account, so the only contention is the global
+write lock. "bcrypt under lock" reproduces the old behaviour by holding the lock
+around the whole call, "bcrypt before lock" is the current code path and
+"bcrypt before lock + pool" also hands the checks to a thread pool.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from _support import use_database, summarize
+
+use_database()
+
+from filelock import FileLock
+from database.account import AccountHandler
+from database.client import ClientHandler
+from database.transaction import TransactionHandler
+from database.operations import LOCK_FILE, connection_manager, ensure_schema
+
+class TimedLock:
+    """FileLock wrapper recording how long the outermost acquisition is held."""
+    def __init__(self, filelock: FileLock) -> None:
+        self.filelock = filelock
+        self.hold_times = []
+        self._local = threading.local()
+
+    def __enter__(self):
+        self.filelock.acquire()
+        self._local.depth = getattr(self._local, "depth", 0) + 1
+        if self._local.depth == 1:
+            self._local.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            self.hold_times.append(time.perf_counter() - self._local.start)
+        self.filelock.release()
+
+class VerifyUnderLock(TransactionHandler):
+    def create_transaction(self, **request):
+        with self.filelock:
+            return super().create_transaction(**request)
+
+def run_mode(label, handler_class, accounts, deposits, hash_executor=None) -> None:
+    lock = TimedLock(FileLock(LOCK_FILE, timeout=60))
+    handler = handler_class(lock, hash_executor=hash_executor)
+
+    def worker(account):
+        for _ in range(deposits):
+            handler.create_transaction(
+                transaction_type="deposit", amount=1, receiver_id=account["id"],
+                password="benchmark", receiver_version=account["version"]
+            )
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(account,)) for account in accounts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print(summarize(f"{label} hold", lock.hold_times), f"throughput={len(lock.hold_times) / elapsed:8.1f} tx/s")
+
+def run(threads: int, deposits: int, rounds: int, persistent: bool) -> None:
+    connection_manager.configure(persistent=persistent)
+    filelock = FileLock(LOCK_FILE, timeout=60)
+    ensure_schema(filelock)
+
+    owner = ClientHandler(filelock).create_client(cpf="00000000000", complete_name="Benchmark Owner")
+    account_handler = AccountHandler(filelock, pwd_salt=rounds)
+    accounts = [account_handler.create_account(owner_id=owner["id"], password="benchmark") for _ in range(threads)]
+
+    run_mode("bcrypt under lock", VerifyUnderLock, accounts, deposits)
+    run_mode("bcrypt before lock", TransactionHandler, accounts, deposits)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        run_mode("bcrypt before lock + pool", TransactionHandler, accounts, deposits, hash_executor=pool)
+
+    connection_manager.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--deposits", type=int, default=25)
+    parser.add_argument("--rounds", type=int, default=10, help="bcrypt cost factor of the benchmark accounts")
+    parser.add_argument("--persistent", action="store_true", help="keep the connection open between operations")
+    args = parser.parse_args()
+    run(args.threads, args.deposits, args.rounds, args.persistent)
@@ -0,0 +1,70 @@
+"""Per-operation latency of the handlers with and without the shared engine.
+
+Usage: python benchmarks/operation_latency.py [--iterations N]
+
+"per-operation engine" reproduces the old behaviour (a fresh engine built and
+disposed around every call), "shared engine" is the default connection manager
+and "persistent connection" keeps the DuckDB connection open between calls.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from _support import use_database, summarize, timed
+
+use_database()
+
+from filelock import FileLock
+from database.account import AccountHandler
+from database.client import ClientHandler
+from sqlalchemy.orm import scoped_session, sessionmaker
+from database.table_model import BankAccount, get_declarative_base
+from database.operations import LOCK_FILE, connection_manager, ensure_schema, get_engine
+
+def legacy_get_account(account_id: int):
+    # What every operation used to do: new engine, new session factory, reflection
+    engine = get_engine()
+    smaker = scoped_session(sessionmaker(bind=engine, autocommit=False, autoflush=False))
+    get_declarative_base().metadata.reflect(bind=engine)
+    session = smaker()
+    account = session.query(BankAccount).filter_by(id=account_id).first()
+    smaker.remove()
+    engine.dispose()
+    return account
+
+def run(iterations: int) -> None:
+    filelock = FileLock(LOCK_FILE, timeout=10)
+    clients = ClientHandler(filelock)
+    accounts = AccountHandler(filelock)
+
+    ensure_schema(filelock)
+    owner = clients.create_client(cpf="00000000000", complete_name="Benchmark Owner")
+    account = accounts.create_account(owner_id=owner["id"], password="benchmark")
+
+    results = {}
+    results["get_account per-operation engine"] = [
+        timed(legacy_get_account, account["id"])[0] for _ in range(iterations)
+    ]
+
+    for persistent in (False, True):
+        connection_manager.configure(persistent=persistent)
+        label = "persistent connection" if persistent else "shared engine"
+
+        results[f"get_account {label}"] = [
+            timed(accounts.get_account, account_id=account["id"])[0] for _ in range(iterations)
+        ]
+        results[f"update_client {label}"] = [
+            timed(clients.update_client, client_id=owner["id"], complete_name=f"Owner {i}")[0]
+            for i in range(iterations)
+        ]
+
+    connection_manager.dispose()
+
+    for label, samples in results.items():
+        print(summarize(label, samples))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    run(parser.parse_args().iterations)
@@ -0,0 +1,81 @@
+"""Wall time of starting each CLI, from process launch to exit.
+
+Usage: python benchmarks/startup_time.py [--runs N] [--db PATH]
+
+Every run is a fresh ``python main.py`` fed a short script on stdin: "start" only
+exits, "first query" reads a client before exiting. Runs go against a database with
+a current schema, as most starts do. "connect" starts the CLI against a database
+daemon of the transaction manager, which the benchmark runs for the duration.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from _support import REPO_DIR, use_database, summarize
+
+APPS = ("account-manager", "transaction-manager")
+
+SCRIPTS = {
+    "start": "exit\n",
+    "first query": "get client 1\nexit\n",
+}
+
+def run_cli(app: str, script: str, *args) -> float:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "main.py", *args], cwd=os.path.join(REPO_DIR, app),
+        input=script, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - start
+
+    if result.returncode != 0:
+        raise RuntimeError(f"{app} exited with {result.returncode}: {result.stderr.strip()}")
+
+    return elapsed
+
+def start_daemon(socket_path: str) -> subprocess.Popen:
+    daemon = subprocess.Popen(
+        [sys.executable, "main.py", "--daemon", "--socket", socket_path],
+        cwd=os.path.join(REPO_DIR, "transaction-manager"), stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+
+    while not os.path.exists(socket_path):
+        if daemon.poll() is not None or time.monotonic() > deadline:
+            daemon.kill()
+            raise RuntimeError("The database daemon did not start")
+        time.sleep(0.05)
+
+    return daemon
+
+def run(runs: int, db_file: str) -> None:
+    db_file = use_database(db_file)
+
+    # Creates the schema and the client read by "first query", not measured
+    run_cli("account-manager", "create client 00000000000 Benchmark\nexit\n")
+
+    for app in APPS:
+        for label, script in SCRIPTS.items():
+            samples = [run_cli(app, script) for _ in range(runs)]
+            print(summarize(f"{app} {label}", samples))
+
+    socket_path = f"{db_file}.bench.sock"
+    daemon = start_daemon(socket_path)
+
+    try:
+        for app in APPS:
+            samples = [run_cli(app, SCRIPTS["first query"], "--connect", "--socket", socket_path) for _ in range(runs)]
+            print(summarize(f"{app} connect", samples))
+    finally:
+        daemon.terminate()
+        daemon.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="starts measured per app and script")
+    parser.add_argument("--db", help="database file to use instead of a temporary one")
+    args = parser.parse_args()
+    run(args.runs, args.db)
@@ -0,0 +1,104 @@
+"""Account history lookup latency as the ledger grows, with and without indexes.
+
+Usage: python benchmarks/transaction_history.py [--sizes 100000,1000000,10000000] [--accounts N] [--lookups N]
+
+At every ledger size the same random accounts are looked up with the transactions
+indexes dropped and the old ``payer = ? OR receiver = ?`` filter, and with the
+indexes in place and the current query. Both go through
+``TransactionHandler.list_transactions``, each after an untimed warm-up pass over
+the sample, in two rounds run in opposite orders so neither always goes first.
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from _support import use_database, summarize, timed
+
+use_database()
+
+from filelock import FileLock
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+from database.table_model import Transaction
+from database.transaction import TransactionHandler
+from database.operations import LOCK_FILE, connection_manager, ensure_schema, paginate
+
+def drop_indexes(connection) -> None:
+    for index in Transaction.__table__.indexes:
+        connection.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+
+def create_indexes(connection) -> None:
+    for index in Transaction.__table__.indexes:
+        connection.execute(CreateIndex(index, if_not_exists=True))
+
+def seed_accounts(connection, accounts: int) -> None:
+    connection.execute(text("INSERT INTO clients (id, cpf, complete_name, version) VALUES (1, '0', 'Benchmark Owner', 1)"))
+    connection.execute(text(
+        "INSERT INTO bank_accounts (id, owner, balance, password, version) "
+        "SELECT i, 1, 0, 'x', 1 FROM range(1, :accounts + 1) AS r(i)"
+    ), {"accounts": accounts})
+
+def grow_ledger(connection, start: int, end: int, accounts: int) -> None:
+    # Synthetic transfers spread over every account and over the last year
+    connection.execute(text(
+        "INSERT INTO transactions (id, timestamp, transaction_type, amount, payer, receiver, version) "
+        "SELECT i, TIMESTAMP '2024-01-01' + to_seconds(i % 31536000), 'transfer', 1, "
+        "i % :accounts + 1, (i * 7 + 3) % :accounts + 1, 1 FROM range(:start, :end) AS r(i)"
+    ), {"start": start, "end": end, "accounts": accounts})
+
+class LegacyHistory(TransactionHandler):
+    """The account history query as it was before the indexes."""
+    def _history_query(self, account_id: int, after_id: int, limit: int, db_session):
+        query = db_session.query(Transaction).filter(
+            (Transaction.payer == account_id) | (Transaction.receiver == account_id)
+        )
+        return paginate(query, Transaction.id, after_id, limit)
+
+def measure(engine, handler: TransactionHandler, indexed: bool, sample: list) -> list:
+    with engine.begin() as connection:
+        (create_indexes if indexed else drop_indexes)(connection)
+
+    for account_id in sample:
+        handler.list_transactions(account_id=account_id)  # Warm-up, not measured
+
+    return [timed(handler.list_transactions, account_id=account_id)[0] for account_id in sample]
+
+def run(sizes: list, accounts: int, lookups: int) -> None:
+    connection_manager.configure(persistent=True)
+    ensure_schema(FileLock(LOCK_FILE, timeout=10))
+    filelock = FileLock(LOCK_FILE, timeout=10)
+    handlers = {False: LegacyHistory(filelock), True: TransactionHandler(filelock)}
+    engine = connection_manager.engine
+
+    with engine.begin() as connection:
+        seed_accounts(connection, accounts)
+
+    current = 0
+    for size in sizes:
+        with engine.begin() as connection:
+            drop_indexes(connection)
+            grow_ledger(connection, current, size, accounts)
+        current = size
+
+        sample = random.sample(range(1, accounts + 1), lookups)
+        latencies = {False: [], True: []}
+
+        for order in ((False, True), (True, False)):
+            for indexed in order:
+                latencies[indexed] += measure(engine, handlers[indexed], indexed, sample)
+
+        print(f"ledger rows = {size}")
+        print(summarize("  OR filter, no indexes", latencies[False]))
+        print(summarize("  indexed lookups", latencies[True]))
+
+    connection_manager.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100000,1000000,10000000", help="comma separated ledger sizes")
+    parser.add_argument("--accounts", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=50)
+    args = parser.parse_args()
+    run([int(size) for size in args.sizes.split(",")], args.accounts, args.lookups)
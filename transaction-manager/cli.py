@@ -1,23 +1,73 @@
 import argparse
+import json
+import os
 from cmd import Cmd
 import shlex
-from filelock import FileLock
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Iterable
 from prettytable import PrettyTable
-from sqlalchemy.orm import sessionmaker, class_mapper
-from database.account import AccountHandler
-from database.client import ClientHandler
-from database.transaction import TransactionHandler
+from database.daemon import RemoteHandler
+
+# The database layer (SQLAlchemy, DuckDB) is only imported for local handlers, a CLI
+# connected to the daemon never loads it
+if TYPE_CHECKING:
+    from filelock import FileLock
+    from database.cache import RowCache
+
+# Rows fetched and printed per table by the list command
+PAGE_SIZE = 100
 
 class AccountManagerCLI(Cmd):
     intro = 'Welcome to the Transaction Manager CLI. Type help or ? to list commands.\n'
     prompt = '(transaction-manager) '
     
-    def __init__(self, filelock: FileLock) -> None:
-        self.account = AccountHandler(filelock)
-        self.client = ClientHandler(filelock)
-        self.transaction = TransactionHandler(filelock)
+    def __init__(self, filelock: "FileLock", daemon_address: str = None, row_cache: "RowCache" = None, json_lines: bool = False) -> None:
+        self.scheduler = None
+        self.row_cache = row_cache
+        self.json_lines = json_lines
+        self.line_number = None
+        self.failed = False
+        self._changes = None
+        
+        if daemon_address:
+            # Every operation runs inside the database daemon
+            self.account = RemoteHandler("account", daemon_address)
+            self.client = RemoteHandler("client", daemon_address)
+            self.bulk = RemoteHandler("bulk", daemon_address)
+            self.stats = RemoteHandler("stats", daemon_address)
+            self.row_cache = RemoteHandler("row_cache", daemon_address)
+            self._changes_source = RemoteHandler("changes", daemon_address)
+            self.transaction = RemoteHandler("transaction", daemon_address)
+            self.spool = RemoteHandler("spool", daemon_address)
+        else:
+            from database.account import AccountHandler
+            from database.bulk import BulkLoader
+            from database.client import ClientHandler
+            from database.feed import ChangeLogHandler
+            from database.scheduler import LockScheduler
+            from database.spool import TransactionSpool
+            from database.stats import recorder
+            from database.transaction import TransactionHandler
+            
+            self.scheduler = filelock if isinstance(filelock, LockScheduler) else None
+            self.account = AccountHandler(filelock, row_cache=row_cache)
+            self.client = ClientHandler(filelock, row_cache=row_cache)
+            self.bulk = BulkLoader(filelock)
+            self.stats = recorder
+            self._changes_source = ChangeLogHandler(filelock)
+            self.transaction = TransactionHandler(filelock, row_cache=row_cache)
+            self.spool = TransactionSpool(self.transaction)
         
         super().__init__()
+    
+    @property
+    def changes(self):
+        # Built on first use, importing the feed loads the database layer
+        if self._changes is None:
+            from database.feed import ChangeFeed
+            self._changes = ChangeFeed(self._changes_source)
+        
+        return self._changes
         
     @staticmethod
     def query_result_to_table(result_obj) -> PrettyTable:
@@ -38,6 +88,8 @@ class AccountManagerCLI(Cmd):
         if not sqlalchemy_list_result:
             return "Query result is empty."
         
+        from sqlalchemy.orm import class_mapper
+        
         # Extract the class of the first entity in the result
         entity_class = type(sqlalchemy_list_result[0])
         
@@ -51,6 +103,70 @@ class AccountManagerCLI(Cmd):
             
         return table
     
+    def emit(self, **fields) -> None:
+        # JSON-lines output: one object per row or message, tagged with the script line
+        # Timestamps and decimals come back as objects, written as text
+        print(json.dumps({"line": self.line_number, **fields}, default=str))
+    
+    def show_result(self, result) -> None:
+        if not self.json_lines:
+            print(AccountManagerCLI.query_result_to_table(result))
+        elif not result:
+            self.emit(message="Query result is empty.")
+        else:
+            self.emit(row=dict(result))
+    
+    def show_page(self, page: list) -> None:
+        if not self.json_lines:
+            print(AccountManagerCLI.query_list_result_to_table(page))
+            return
+        
+        from sqlalchemy.orm import class_mapper
+        
+        for entity in page:
+            self.emit(row={col.key: getattr(entity, col.key) for col in class_mapper(type(entity)).columns})
+    
+    def show_message(self, message: str) -> None:
+        if self.json_lines:
+            self.emit(message=message)
+        else:
+            print(message)
+    
+    def show_error(self, error: str) -> None:
+        # Marks the command as failed, a script stops there
+        self.failed = True
+        
+        if self.json_lines:
+            self.emit(error=error)
+        else:
+            print(error)
+    
+    def default(self, line):
+        self.show_error(f"*** Unknown syntax: {line}")
+    
+    def print_pages(self, fetch_page, after_id: int = None, limit: int = None, page_size: int = PAGE_SIZE) -> None:
+        # Walks the result with keyset pagination, only one page is held at a time
+        printed = 0
+        
+        while limit is None or printed < limit:
+            size = page_size if limit is None else min(page_size, limit - printed)
+            page = fetch_page(after_id=after_id, limit=size)
+            
+            if not page:
+                break
+            
+            self.show_page(page)
+            printed += len(page)
+            after_id = page[-1].id
+            
+            if len(page) < size:
+                return
+        
+        if printed == 0:
+            self.show_message("Query result is empty.")
+        elif limit is not None:
+            self.show_message(f"Next page: --after_id {after_id}")
+    
     def do_get(self, args):
         """
         Get a specific account, client, or transaction by ID.
@@ -73,61 +189,68 @@ class AccountManagerCLI(Cmd):
         try:
             parsed_args = parser.parse_args(shlex.split(args))
         except SystemExit as e:
-            print("Invalid usage. Type 'help get' for details.")
+            self.show_error("Invalid usage. Type 'help get' for details.")
             return e
         
         if parsed_args.entity == "client":
             query_result = self.client.get_client(client_id=parsed_args.id)
-            print(AccountManagerCLI.query_result_to_table(query_result))
+            self.show_result(query_result)
             
         elif parsed_args.entity == "account":
             query_result = self.account.get_account(account_id=parsed_args.id)
-            print(AccountManagerCLI.query_result_to_table(query_result))
+            self.show_result(query_result)
         
         elif parsed_args.entity == "transaction":
             query_result = self.transaction.get_transaction(transaction_id=parsed_args.id)
-            print(AccountManagerCLI.query_result_to_table(query_result))
+            self.show_result(query_result)
 
     def do_list(self, args):
         """
         List accounts, clients, or transactions with optional filters.
-        Usage: list account
-               list client
-               list transaction
+        Results are fetched page by page, ordered by ID.
+        Usage: list account [--after_id <id>] [--limit <limit>]
+               list client [--after_id <id>] [--limit <limit>]
+               list transaction [--account_id <account_id>] [--after_id <id>] [--limit <limit>]
         """
         parser = argparse.ArgumentParser(prog='list', add_help=False)
         subparsers = parser.add_subparsers(dest='entity', help='Entity to list (account, client, or transaction)')
         
-        subparsers.add_parser('account')
-        subparsers.add_parser('client')
-        subparsers.add_parser('transaction')
+        account_parser = subparsers.add_parser('account')
+        client_parser = subparsers.add_parser('client')
+        transaction_parser = subparsers.add_parser('transaction')
+        transaction_parser.add_argument('--account_id', '--account-id', dest='account_id', type=int, help='Only transactions of this account')
+        
+        for entity_parser in (account_parser, client_parser, transaction_parser):
+            entity_parser.add_argument('--after_id', '--after-id', dest='after_id', type=int, help='Start after this ID')
+            entity_parser.add_argument('--limit', type=int, help='Maximum number of rows to show')
         
         try:
             parsed_args = parser.parse_args(shlex.split(args))
         except SystemExit as e:
             # Catch argparse help or error and print usage without exiting
-            print("Invalid usage. Type 'help list' for details.")
+            self.show_error("Invalid usage. Type 'help list' for details.")
             return e
         
         if parsed_args.entity == "client":
-            query_result = self.client.list_client()
-            print(AccountManagerCLI.query_list_result_to_table(query_result))
+            self.print_pages(self.client.list_client, parsed_args.after_id, parsed_args.limit)
             
         elif parsed_args.entity == "account":
-            query_result = self.account.list_account()
-            print(AccountManagerCLI.query_list_result_to_table(query_result))
+            self.print_pages(self.account.list_account, parsed_args.after_id, parsed_args.limit)
         
         elif parsed_args.entity == "transaction":
-            query_result = self.transaction.list_transactions()
-            print(AccountManagerCLI.query_list_result_to_table(query_result))
+            self.print_pages(
+                lambda **page: self.transaction.list_transactions(account_id=parsed_args.account_id, **page),
+                parsed_args.after_id, parsed_args.limit
+            )
     
     def do_transaction(self, args):
         """
-        Create a new transaction.
-        Usage: transaction create <transaction_type> [--payer_id <payer_id>] [--receiver_id <receiver_id>] [--password <password>] [--payer_version <payer_version>] [--receiver_version <receiver_version>] <amount>
+        Create a new transaction, or spool it and get a ticket without waiting for the writer.
+        Usage: transaction create <transaction_type> [--payer_id <payer_id>] [--receiver_id <receiver_id>] [--password <password>] [--payer_version <payer_version>] [--receiver_version <receiver_version>] [--idempotency_key <key>] [--spool] <amount>
+               transaction status <ticket>
         """
         parser = argparse.ArgumentParser(prog='transaction', add_help=False)
-        subparsers = parser.add_subparsers(dest='action', help='Action to perform (create)')
+        subparsers = parser.add_subparsers(dest='action', help='Action to perform (create or status)')
         
         create_parser = subparsers.add_parser('create')
         create_parser.add_argument('transaction_type', choices=['deposit', 'withdrawal', 'transaction'], help='Type of the transaction')
@@ -136,16 +259,25 @@ class AccountManagerCLI(Cmd):
         create_parser.add_argument('--password', help='Password for the transaction')
         create_parser.add_argument('--payer_version', type=int, help='Payer version for the transaction')
         create_parser.add_argument('--receiver_version', type=int, help='Receiver version for the transaction')
+        create_parser.add_argument('--idempotency_key', help='Key making a retried request return the original transaction')
+        create_parser.add_argument('--spool', action='store_true', help='Queue the transaction and return a ticket right away')
         create_parser.add_argument('amount', type=float, help='Amount for the transaction')
         
+        status_parser = subparsers.add_parser('status')
+        status_parser.add_argument('ticket', help='Ticket returned by a spooled transaction')
+        
         try:
             parsed_args = parser.parse_args(shlex.split(args))
         except SystemExit as e:
-            print("Invalid usage. Type 'help transaction' for details.")
+            self.show_error("Invalid usage. Type 'help transaction' for details.")
             return e
         
-        if parsed_args.action == "create":
-            new_transaction = self.transaction.create_transaction(
+        if parsed_args.action == "create" and parsed_args.spool:
+            if parsed_args.idempotency_key:
+                self.show_error("A spooled transaction uses its ticket as idempotency key.")
+                return
+            
+            ticket = self.spool.submit(
                 amount=parsed_args.amount,
                 transaction_type=parsed_args.transaction_type,
                 payer_id=parsed_args.payer_id,
@@ -154,10 +286,218 @@ class AccountManagerCLI(Cmd):
                 payer_version=parsed_args.payer_version,
                 receiver_version=parsed_args.receiver_version
             )
-            print("Transaction created:")
-            print(AccountManagerCLI.query_result_to_table(new_transaction))
+            self.show_message(f"Transaction spooled, ticket: {ticket}")
+        
+        elif parsed_args.action == "create":
+            new_transaction = self.transaction.create_transaction(
+                amount=parsed_args.amount,
+                transaction_type=parsed_args.transaction_type,
+                payer_id=parsed_args.payer_id,
+                receiver_id=parsed_args.receiver_id,
+                password=parsed_args.password,
+                payer_version=parsed_args.payer_version,
+                receiver_version=parsed_args.receiver_version,
+                idempotency_key=parsed_args.idempotency_key
+            )
+            self.show_message("Transaction created:")
+            self.show_result(new_transaction)
+        
+        elif parsed_args.action == "status":
+            outcome = self.spool.status(parsed_args.ticket)
+            self.show_message(f"Ticket {parsed_args.ticket}: {outcome['status']}")
+            
+            if outcome["status"] == "ok":
+                self.show_result(outcome["transaction"])
+            elif outcome["status"] == "error":
+                self.show_message(outcome["error"])
+            elif outcome["status"] == "unknown":
+                self.show_message("No spooled transaction has this ticket, or its outcome has expired.")
+    
+    def do_import(self, args):
+        """
+        Import clients, accounts, or transactions from a CSV or Parquet file in one atomic step.
+        The whole file is rejected if any row fails validation.
+        Usage: import client <path>
+               import account <path>
+               import transaction <path>
+        """
+        parser = argparse.ArgumentParser(prog='import', add_help=False)
+        parser.add_argument('entity', choices=['client', 'account', 'transaction'], help='Entity to import (client, account, or transaction)')
+        parser.add_argument('path', help='CSV or Parquet file to import')
+        
+        try:
+            parsed_args = parser.parse_args(shlex.split(args))
+        except SystemExit as e:
+            self.show_error("Invalid usage. Type 'help import' for details.")
+            return e
+        
+        # Resolved here so a daemon reads the same file
+        path = os.path.realpath(parsed_args.path)
+        
+        if parsed_args.entity == "client":
+            imported = self.bulk.import_clients(path=path)
+            
+        elif parsed_args.entity == "account":
+            imported = self.bulk.import_accounts(path=path)
+            
+        elif parsed_args.entity == "transaction":
+            imported = self.bulk.import_transactions(path=path)
+            
+        self.show_message(f"Imported {imported} {parsed_args.entity} row(s) from {path}")
+    
+    def do_changes(self, args):
+        """
+        Show what either system changed since the last call, oldest first.
+        The first call only marks where the feed starts, unless --after is given.
+        Usage: changes [--after <seq>] [--limit <limit>]
+        """
+        parser = argparse.ArgumentParser(prog='changes', add_help=False)
+        parser.add_argument('--after', type=int, help='Show the changes after this sequence number')
+        parser.add_argument('--limit', type=int, help='Maximum number of changes to show')
+        
+        try:
+            parsed_args = parser.parse_args(shlex.split(args))
+        except SystemExit as e:
+            self.show_error("Invalid usage. Type 'help changes' for details.")
+            return e
+        
+        if parsed_args.after is not None:
+            self.changes.seek(parsed_args.after)
+        
+        changes = self.changes.poll(parsed_args.limit)
+        
+        if not changes:
+            self.show_message(f"No changes after sequence {self.changes.position}.")
+            return
+        
+        if self.json_lines:
+            for change in changes:
+                self.emit(row=change)
+            return
+        
+        table = PrettyTable()
+        table.field_names = list(changes[0].keys())
+        
+        for change in changes:
+            table.add_row(list(change.values()))
+        
+        print(table)
+    
+    def do_stats(self, args):
+        """
+        Show latency percentiles per operation and phase (lock_wait, lock_hold, query, rollback, bcrypt)
+        and the depth of the write-lock queue, and the row cache counters when it is enabled.
+        With a daemon, the statistics are the daemon's, which runs every operation.
+        Usage: stats [--json] [--output <path>] [--reset]
+        """
+        parser = argparse.ArgumentParser(prog='stats', add_help=False)
+        parser.add_argument('--json', action='store_true', help='Print the statistics as JSON')
+        parser.add_argument('--output', help='Write the statistics as JSON to this file')
+        parser.add_argument('--reset', action='store_true', help='Clear the statistics after showing them')
+        
+        try:
+            parsed_args = parser.parse_args(shlex.split(args))
+        except SystemExit as e:
+            self.show_error("Invalid usage. Type 'help stats' for details.")
+            return e
+        
+        snapshot = self.stats.snapshot()
+        
+        if self.scheduler is not None:
+            snapshot["write_queue"] = self.scheduler.metrics()
+        
+        if self.row_cache is not None:
+            try:
+                snapshot["row_cache"] = self.row_cache.metrics()
+            except ValueError:
+                pass  # The daemon runs without a row cache
+        
+        if parsed_args.output:
+            with open(parsed_args.output, "w") as output_file:
+                json.dump(snapshot, output_file, indent=2)
+            self.show_message(f"Statistics written to {parsed_args.output}")
+        
+        elif self.json_lines:
+            self.emit(stats=snapshot)
+        
+        elif parsed_args.json:
+            print(json.dumps(snapshot, indent=2))
+        
+        else:
+            write_queue = snapshot.pop("write_queue", None)
+            row_cache = snapshot.pop("row_cache", None)
+            
+            if write_queue is not None:
+                print(
+                    f"Write queue: depth {write_queue['queue_depth']}, max {write_queue['max_queue_depth']}, "
+                    f"mean {write_queue['mean_queue_depth']}, acquired {write_queue['acquired']}, aged {write_queue['aged']}"
+                )
+            
+            if row_cache is not None:
+                print(
+                    f"Row cache: {row_cache['entries']} entries, {row_cache['hits']} hits, {row_cache['misses']} misses "
+                    f"(hit rate {row_cache['hit_rate']}), {row_cache['invalidations']} invalidations"
+                )
+            
+            if not snapshot:
+                print("No operations recorded yet.")
+            else:
+                table = PrettyTable()
+                table.field_names = ["operation", "phase", "count", "p50 (ms)", "p95 (ms)", "p99 (ms)", "max (ms)"]
+                
+                for operation, phases in snapshot.items():
+                    for phase, summary in phases.items():
+                        table.add_row([
+                            operation, phase, summary["count"],
+                            summary["p50_ms"], summary["p95_ms"], summary["p99_ms"], summary["max_ms"]
+                        ])
+                
+                print(table)
+        
+        if parsed_args.reset:
+            self.stats.reset()
     
     def do_exit(self, arg):
         'Exit the Account Manager CLI'
-        print('Goodbye!')
+        self.show_message('Goodbye!')
+        return True
+    
+    def run_script(self, lines: Iterable[str], transaction: bool = False) -> bool:
+        """
+        Run commands one per line, skipping blank lines and # comments, until the first
+        one that fails or exit. With ``transaction``, every command runs in one database
+        transaction, committed only if all of them succeed. Returns whether they did.
+        """
+        script_transaction = nullcontext()
+        
+        if transaction:
+            from database.operations import connection_manager
+            script_transaction = connection_manager.transaction()
+        
+        with script_transaction as database_transaction:
+            for self.line_number, line in enumerate(lines, start=1):
+                line = line.strip()
+                
+                if not line or line.startswith("#"):
+                    continue
+                
+                self.failed = False
+                
+                try:
+                    stop = self.onecmd(line)
+                except Exception as e:
+                    self.show_error(str(e))
+                
+                if self.failed:
+                    if database_transaction is not None:
+                        if database_transaction.is_active:
+                            database_transaction.rollback()  # A failed write already ended it
+                        self.show_message(f"Script stopped at line {self.line_number}, every change was rolled back.")
+                    else:
+                        self.show_message(f"Script stopped at line {self.line_number}.")
+                    return False
+                
+                if stop is True:
+                    break
+        
         return True
\ No newline at end of file
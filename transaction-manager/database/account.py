@@ -1,17 +1,46 @@
+import csv
+import os
+import tempfile
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List
 import bcrypt
 from filelock import FileLock
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, sessionmaker
-from database.operations import OperationHandler, write_operation, read_operation
+from database.bulk import sql_string
+from database.cache import RowCache
+from database.changes import record_selected
+from database.stats import recorder
+from database.operations import OperationHandler, write_operation, read_operation, stream_operation, paginate, fetch_columnar, select_columns
 from .table_model import BankAccount
 
+ACCOUNTS = BankAccount.__table__
+
+# Below this many passwords a process pool costs more than it saves
+PARALLEL_HASH_THRESHOLD = 32
+
+def hash_password(password: str, rounds: int) -> bytes:
+    # Module level so it can be shipped to a process pool
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds))
+
 class AccountHandler(OperationHandler):
-    def __init__(self, filelock: FileLock, pwd_salt: int = 6) -> None:
+    def __init__(self, filelock: FileLock, pwd_salt: int = 6, hash_executor: Executor = None, row_cache: RowCache = None) -> None:
         super().__init__(filelock)
         self.pwd_salt = pwd_salt
+        # Optional process pool for bulk hashing, a temporary one is used otherwise
+        self.hash_executor = hash_executor
+        # Optional cache of account rows, shared with the other handlers of the process
+        self.row_cache = row_cache
     
     # Read operations _____________________________________________________________
+    def get_account(self, account_id: int):
+        if self.row_cache is None:
+            return self._read_account(account_id)
+        return self.row_cache.get("account", account_id, self._read_account)
+    
     @read_operation
-    def get_account(self, account_id: int, db_session: Session = None):
+    def _read_account(self, account_id: int, db_session: Session = None):
         account = db_session.query(BankAccount).filter_by(id=account_id).first()
     
         return {
@@ -22,14 +51,93 @@ class AccountHandler(OperationHandler):
         }
         
     @read_operation
-    def list_account(self, owner_id: int = None, db_session: Session = None):
-        return db_session.query(BankAccount).all()
+    def list_account(self, owner_id: int = None, after_id: int = None, limit: int = None, db_session: Session = None):
+        return paginate(db_session.query(BankAccount), BankAccount.id, after_id, limit).all()
+    
+    @read_operation
+    def fetch_accounts(self, columns: List[str] = None, output: str = "arrow", db_session: Session = None):
+        return fetch_columnar(db_session, select_columns(ACCOUNTS, columns).order_by(ACCOUNTS.c.id), output)
+    
+    @stream_operation
+    def iter_accounts(self, after_id: int = None, batch_size: int = 1000, db_session: Session = None):
+        yield from paginate(db_session.query(BankAccount), BankAccount.id, after_id).yield_per(batch_size)
 
     # Write operations ____________________________________________________________
+    def create_accounts(self, accounts: List[tuple], workers: int = None) -> List[dict]:
+        """
+        Create many accounts from ``(owner_id, password)`` pairs in a single transaction.
+        Passwords are hashed in parallel before the write lock is taken, the lock is only
+        held for the insert. Either every account is created or none is.
+        """
+        if not accounts:
+            return []
+        
+        owners, passwords = zip(*accounts)
+        with recorder.measure("AccountHandler.create_accounts", "bcrypt"):
+            hashes = self._hash_passwords(list(passwords), workers)
+        
+        return self._insert_accounts(list(owners), hashes)
+    
+    def _hash_passwords(self, passwords: List[str], workers: int = None) -> List[bytes]:
+        rounds = [self.pwd_salt] * len(passwords)
+        
+        if self.hash_executor is not None:
+            return list(self.hash_executor.map(hash_password, passwords, rounds))
+        
+        if len(passwords) < PARALLEL_HASH_THRESHOLD:
+            return [hash_password(password, self.pwd_salt) for password in passwords]
+        
+        workers = workers or os.cpu_count() or 1
+        # Large chunks keep the pickling overhead small next to the bcrypt work
+        chunksize = max(1, len(passwords) // (workers * 4))
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(hash_password, passwords, rounds, chunksize=chunksize))
+    
+    @write_operation
+    def _insert_accounts(self, owners: List[int], hashes: List[bytes], db_session: Session = None) -> List[dict]:
+        # Ids are drawn from the sequence in one statement instead of one flush per account
+        ids = db_session.execute(
+            text("SELECT nextval('bkacc_id_seq') FROM range(:count)"),
+            {"count": len(owners)}
+        ).scalars().all()
+        
+        passwords = [hashed.decode('utf-8') for hashed in hashes]
+        
+        # Binding hundreds of thousands of parameters is far slower than DuckDB's CSV
+        # reader, so the batch is spooled to a temporary file and loaded in one statement
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", newline="", delete=False) as staging:
+            writer = csv.writer(staging)
+            writer.writerow(["id", "owner", "password"])
+            writer.writerows(zip(ids, owners, passwords))
+        
+        staged = (
+            f"read_csv({sql_string(staging.name)}, header = true, "
+            "columns = {'id': 'BIGINT', 'owner': 'BIGINT', 'password': 'VARCHAR'})"
+        )
+        
+        try:
+            db_session.execute(text(
+                "INSERT INTO bank_accounts (id, owner, balance, password, version) "
+                f"SELECT id, owner, 0, password, 1 FROM {staged}"
+            ))
+            record_selected(db_session, "bank_accounts", "insert", f"SELECT id, 1 AS version FROM {staged}")
+        except IntegrityError as e:
+            raise ValueError(f"Accounts reference a client that does not exist: {e.orig}") from e
+        finally:
+            os.unlink(staging.name)
+        
+        return [
+            {"id": account_id, "owner": owner, "password": password, "version": 1}
+            for account_id, owner, password in zip(ids, owners, passwords)
+        ]
+    
     @write_operation
     def create_account(self, owner_id: int, password: str, db_session: Session = None):
-        hash_pwd = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(self.pwd_salt))
-        new_account = BankAccount(owner=owner_id, password=hash_pwd)
+        with recorder.measure("AccountHandler.create_account", "bcrypt"):
+            hash_pwd = hash_password(password, self.pwd_salt)
+        # Stored and returned as text, as reads and create_accounts return it
+        new_account = BankAccount(owner=owner_id, password=hash_pwd.decode('utf-8'))
         db_session.add(new_account)
         db_session.flush()  # Ensure the instance is bound to the session
         
@@ -50,8 +158,9 @@ class AccountHandler(OperationHandler):
         if owner_id:
             account.owner = owner_id
         if password:
-            hash_pwd = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(self.pwd_salt))
-            account.password = hash_pwd
+            with recorder.measure("AccountHandler.update_account", "bcrypt"):
+                hash_pwd = hash_password(password, self.pwd_salt)
+            account.password = hash_pwd.decode('utf-8')
             
         account.version += 1
         db_session.flush()  # Ensure the instance is bound to the session
@@ -0,0 +1,83 @@
+import asyncio
+import inspect
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+
+# Operations in flight per handler, further callers wait on the semaphore
+MAX_CONCURRENCY = 32
+
+# Rows fetched per executor round trip when iterating a stream operation
+STREAM_CHUNK = 1000
+
+class AsyncHandler:
+    """Asyncio counterpart of an ``AccountHandler``, ``ClientHandler`` or ``TransactionHandler``.
+
+    Every public method of the wrapped handler becomes a coroutine that runs in a
+    bounded thread pool, so waiting for the write lock, DuckDB I/O and bcrypt never
+    block the event loop. At most ``max_concurrency`` operations run at a time, the
+    rest wait on a semaphore without holding a thread. Stream operations (``iter_*``)
+    become async generators fetching ``STREAM_CHUNK`` rows per round trip, each on a
+    thread of its own which opens, reads and closes it: a read-only stream blocks the
+    writes of the thread holding it. For heavy hashing, give the handler itself a
+    ``hash_executor`` process pool.
+    """
+    def __init__(self, handler, executor: Executor = None, max_concurrency: int = MAX_CONCURRENCY) -> None:
+        self.handler = handler
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="db")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        target = getattr(self.handler, name)
+
+        if not callable(target):
+            return target  # Counters and settings are read as they are
+
+        if inspect.isgeneratorfunction(getattr(type(self.handler), name, None)):
+            def stream(*args, **kwargs):
+                return self._stream(partial(target, *args, **kwargs))
+            stream.__name__ = name
+            return stream
+
+        async def call(*args, **kwargs):
+            return await self._run(partial(target, *args, **kwargs))
+
+        call.__name__ = name
+        return call
+
+    async def _run(self, func, executor: Executor = None):
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(executor or self.executor, func)
+
+    async def _stream(self, open_stream):
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-stream")
+
+        try:
+            rows = await self._run(open_stream, executor)
+
+            try:
+                while True:
+                    chunk = await self._run(partial(list, islice(rows, STREAM_CHUNK)), executor)
+                    if not chunk:
+                        return
+
+                    for row in chunk:
+                        yield row
+            finally:
+                await self._run(rows.close, executor)  # Closes the stream's session
+        finally:
+            executor.shutdown(wait=False)
+
+    async def close(self) -> None:
+        if self._owns_executor:
+            await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
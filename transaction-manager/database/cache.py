@@ -0,0 +1,140 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List
+
+from database.feed import ChangeFeed, ChangeLogHandler
+from database.operations import connection_manager
+from database.settings import DB_FILE
+
+class RowCache:
+    """Bounded LRU cache of account and client rows, kept current through the change log.
+
+    Entries are keyed by entity and id and hold the row as its handler returns it.
+    Before each lookup the cache compares the size and modification time of the
+    database file and its WAL with the last check, which costs no query. Only when
+    some process committed since does it read the new changes from the change log,
+    and drop the entries they name with a newer version or a delete. Balance moves
+    keep the account version, and the cached rows hold no balance. While reads come
+    from a snapshot missing some commits, every lookup reads the change log again.
+    """
+    def __init__(self, changes: ChangeLogHandler, max_entries: int = 10000) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._feed = ChangeFeed(changes)
+        self._signature = None
+        self._entries = OrderedDict()
+        self._mutex = threading.Lock()
+        self._sync_mutex = threading.Lock()
+
+    def _file_signature(self) -> tuple:
+        signature = []
+
+        for path in (DB_FILE, f"{DB_FILE}.wal"):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+
+        return tuple(signature)
+
+    def _sync(self) -> int:
+        # Returns the change log position the entries are current with
+        with self._sync_mutex:
+            signature = self._file_signature()
+
+            if signature != self._signature:
+                # Taken before polling, so a commit landing meanwhile is seen next time.
+                # A poll answered by a lagging snapshot may miss commits, it does not count.
+                if not connection_manager.reads_lag():
+                    self._signature = signature
+
+                for change in self._feed.poll():
+                    key = (change["entity"], change["entity_id"])
+
+                    with self._mutex:
+                        entry = self._entries.get(key)
+
+                        if entry is not None and (
+                            change["operation"] == "delete" or change["version"] is None or change["version"] > entry["version"]
+                        ):
+                            del self._entries[key]
+                            self.invalidations += 1
+
+            return self._feed.position
+
+    def _lookup(self, entity: str, ids: List[int]) -> Dict[int, dict]:
+        found = {}
+
+        with self._mutex:
+            for entity_id in ids:
+                row = self._entries.get((entity, entity_id))
+
+                if row is not None:
+                    self._entries.move_to_end((entity, entity_id))
+                    found[entity_id] = row
+
+            self.hits += len(found)
+            self.misses += len(ids) - len(found)
+
+        return found
+
+    def _store(self, entity: str, rows: Dict[int, dict], position: int) -> None:
+        with self._mutex:
+            # Rows read while new changes were polled may predate them, they are not kept
+            if position != self._feed.position:
+                return
+
+            for entity_id, row in rows.items():
+                self._entries[(entity, entity_id)] = row
+                self._entries.move_to_end((entity, entity_id))
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, entity: str, entity_id: int, load: Callable[[int], dict]) -> dict:
+        """
+        Returns the cached row, or the one returned by ``load(entity_id)`` which is then kept.
+        """
+        position = self._sync()
+        found = self._lookup(entity, [entity_id])
+
+        if entity_id in found:
+            return found[entity_id]
+
+        row = load(entity_id)
+        self._store(entity, {entity_id: row}, position)
+        return row
+
+    def get_many(self, entity: str, ids: List[int], load: Callable[[List[int]], Dict[int, dict]]) -> Dict[int, dict]:
+        """
+        Same as ``get`` for several ids, ``load`` receives the missing ones and returns rows by id.
+        """
+        position = self._sync()
+        found = self._lookup(entity, ids)
+        missing = [entity_id for entity_id in ids if entity_id not in found]
+
+        if missing:
+            loaded = load(missing)
+            self._store(entity, loaded, position)
+            found.update(loaded)
+
+        return found
+
+    def metrics(self) -> dict:
+        with self._mutex:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+                "invalidations": self.invalidations,
+            }
+
+    def clear(self) -> None:
+        with self._mutex:
+            self._entries.clear()
@@ -1,14 +1,28 @@
-from typing import List
-from database.operations import OperationHandler, read_operation, write_operation
+from typing import Iterator, List
+from filelock import FileLock
+from database.cache import RowCache
+from database.operations import OperationHandler, read_operation, write_operation, stream_operation, paginate, fetch_columnar, select_columns
 from database.table_model import Client, BankAccount
 from sqlalchemy.orm import Session
 from prettytable import PrettyTable
 
+CLIENTS = Client.__table__
+
 
 class ClientHandler(OperationHandler):
+    def __init__(self, filelock: FileLock, row_cache: RowCache = None) -> None:
+        super().__init__(filelock)
+        # Optional cache of client rows, shared with the other handlers of the process
+        self.row_cache = row_cache
+    
     # Read operations _____________________________________________________________
+    def get_client(self, client_id: int) -> Client:
+        if self.row_cache is None:
+            return self._read_client(client_id)
+        return self.row_cache.get("client", client_id, self._read_client)
+    
     @read_operation
-    def get_client(self, client_id: int, db_session: Session = None) -> Client:
+    def _read_client(self, client_id: int, db_session: Session = None) -> Client:
         client = db_session.query(Client).filter_by(id=client_id).first()
         return {
             "id": client.id,
@@ -19,8 +33,16 @@ class ClientHandler(OperationHandler):
         
         
     @read_operation
-    def list_client(self, owner_id: int = None, db_session: Session = None) -> List[Client]:
-        return db_session.query(Client).all()
+    def list_client(self, owner_id: int = None, after_id: int = None, limit: int = None, db_session: Session = None) -> List[Client]:
+        return paginate(db_session.query(Client), Client.id, after_id, limit).all()
+    
+    @read_operation
+    def fetch_clients(self, columns: List[str] = None, output: str = "arrow", db_session: Session = None):
+        return fetch_columnar(db_session, select_columns(CLIENTS, columns).order_by(CLIENTS.c.id), output)
+    
+    @stream_operation
+    def iter_clients(self, after_id: int = None, batch_size: int = 1000, db_session: Session = None) -> Iterator[Client]:
+        yield from paginate(db_session.query(Client), Client.id, after_id).yield_per(batch_size)
 
     # Write operations ____________________________________________________________
     @write_operation
@@ -0,0 +1,60 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
+class CredentialCache:
+    """Bounded LRU cache of successful password verifications.
+
+    Entries are keyed by account id and ``BankAccount.version``. ``update_account`` bumps
+    the version whenever the password changes, so an entry verified against an old
+    password can never match again and simply ages out. Only an HMAC of the password,
+    under a key generated for this process, is kept in memory.
+    """
+    def __init__(self, max_entries: int = 10000, ttl: float = 300.0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._secret = os.urandom(32)
+        self._entries = OrderedDict()
+        self._mutex = threading.Lock()
+
+    def _digest(self, password: str) -> bytes:
+        return hmac.new(self._secret, password.encode(), hashlib.sha256).digest()
+
+    def is_verified(self, account_id: int, version: int, password: str) -> bool:
+        key = (account_id, version)
+        digest = self._digest(password)
+
+        with self._mutex:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[1] < time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is None or not hmac.compare_digest(entry[0], digest):
+                self.misses += 1
+                return False
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True
+
+    def remember(self, account_id: int, version: int, password: str) -> None:
+        key = (account_id, version)
+        entry = (self._digest(password), time.monotonic() + self.ttl)
+
+        with self._mutex:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._mutex:
+            self._entries.clear()
@@ -1,78 +1,657 @@
+import importlib.util
 import os
-from filelock import FileLock
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session
-from functools import wraps
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
 
-from database.table_model import get_declarative_base
+import duckdb
+from filelock import FileLock, Timeout
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.orm import Session, sessionmaker, scoped_session
+from sqlalchemy.pool import NullPool
+from sqlalchemy.schema import CreateIndex
+from functools import partial, wraps
 
-DB_FILE = os.path.realpath(os.getenv("DATABASE_PATH"))
-LOCK_FILE = f"{DB_FILE}.lock"
+from database.changes import record_flush
+from database.scheduler import MAINTENANCE_PRIORITY, LockScheduler
+from database.settings import DB_FILE, LOCK_FILE, SNAPSHOT_FILE, SNAPSHOT_INTERVAL
+from database.stats import recorder
+from database.table_model import SCHEMA_VERSION, ChangeLog, IdempotencyKey, SchemaVersion, Transaction, get_declarative_base
 
-def get_engine():
-    return create_engine(f"duckdb:///{DB_FILE}")
+# A write aborted by a concurrent write to the same rows is run again up to
+# CONFLICT_RETRIES times, after a jittered backoff doubling up to CONFLICT_MAX_BACKOFF
+CONFLICT_RETRIES = int(os.getenv("DATABASE_CONFLICT_RETRIES", "5"))
+CONFLICT_BACKOFF = 0.005
+CONFLICT_MAX_BACKOFF = 0.2
 
-def create_access(create_table=False):
-    engine = get_engine()
-    sqa_base = get_declarative_base()
-    
-    smaker = scoped_session(
-        sessionmaker(
-            bind=engine, 
-            autocommit=False, 
-            autoflush=False
-        )
-    )
-    
-    if create_table:
-        sqa_base.metadata.create_all(bind=engine)
+class WriteConflictError(ValueError):
+    """Concurrent writes to the same rows kept aborting a write until its retries ran out."""
+
+# Opening a connection is retried while another process holds the file, for at most
+# BUSY_TIMEOUT seconds with a jittered backoff doubling up to BUSY_MAX_BACKOFF
+BUSY_TIMEOUT = 5.0
+BUSY_BACKOFF = 0.005
+BUSY_MAX_BACKOFF = 0.1
+
+def get_engine(persistent: bool = False):
+    if persistent:
+        return create_engine(f"duckdb:///{DB_FILE}")
+
+    # Without pooling every checkout opens the file and every release closes it,
+    # so the other system can open the database between our operations
+    return create_engine(f"duckdb:///{DB_FILE}", poolclass=NullPool)
+
+def get_read_engine(path: str = DB_FILE):
+    # Any number of processes may hold read-only connections, but none while a
+    # process writes. Never pooled, so a replaced snapshot is picked up right away.
+    return create_engine(f"duckdb:///{path}", connect_args={"read_only": True}, poolclass=NullPool)
+
+def is_file_busy(error: Exception) -> bool:
+    # Another process holds the database file in a conflicting mode
+    error = getattr(error, "orig", error)
+    return isinstance(error, duckdb.IOException) and "Could not set lock" in str(error)
+
+class ConnectionManager:
+    """Process-wide owner of the engine and session factory used by every handler.
+
+    The engine is built once, on first use, instead of once per operation. By default
+    connections are not kept between operations because DuckDB only allows one process
+    to hold the database file for writing, and both systems share it. Processes that
+    own the database alone (daemon, scripts) can set ``persistent=True`` to keep the
+    connection open for their whole lifetime.
+
+    A persistent process can also run everything one thread does in a single
+    transaction, see ``transaction``.
+
+    Other processes read through read-only connections, from the snapshot copy when
+    there is one. DuckDB refuses read-only and read-write connections to the same
+    file within a process, so reads join the read-write mode while this process
+    writes, and writes wait for the open read-only connections to close before they
+    take the write lock.
+    """
+    def __init__(self, persistent: bool = False, snapshot: str = SNAPSHOT_FILE, snapshot_interval: float = SNAPSHOT_INTERVAL) -> None:
+        self.persistent = persistent
+        self.snapshot = snapshot
+        self.snapshot_interval = snapshot_interval
+        # Commits of this process not copied yet, its own reads must not miss them
+        self._snapshot_behind = False
+        self._engine = None
+        self._smaker = None
+        self._read_smakers = {}
+        self._mutex = threading.Lock()
+        self._snapshot_mutex = threading.Lock()
+        self._modes = threading.Condition()
+        self._open = {"read_write": 0, "read_only": 0}
+        self._waiting_writers = 0
+        # Read-only connections open per thread, counted against the thread that opened
+        # them even when a stream is closed from another one
+        self._read_only_threads = Counter()
+        self._local = threading.local()
+        # Only tried, never waited on: tells whether some process is writing
+        self._write_probe = FileLock(LOCK_FILE, timeout=0)
+        # Write locks this process holds through its handlers, see TrackedWriteLock
+        self._write_locks_held = 0
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            with self._mutex:
+                if self._engine is None:
+                    with recorder.measure("connection", "engine_create"):
+                        self._engine = get_engine(persistent=self.persistent)
+        return self._engine
+
+    @property
+    def smaker(self) -> scoped_session:
+        if self._smaker is None:
+            engine = self.engine
+            with self._mutex:
+                if self._smaker is None:
+                    self._smaker = scoped_session(
+                        sessionmaker(
+                            bind=engine,
+                            autocommit=False,
+                            autoflush=False
+                        )
+                    )
+        return self._smaker
+
+    @property
+    def bind(self):
+        # The connection of this thread's transaction when it runs one, else the engine
+        return getattr(self._local, "connection", None) or self.engine
+
+    def read_smaker(self, path: str) -> sessionmaker:
+        if path not in self._read_smakers:
+            with self._mutex:
+                if path not in self._read_smakers:
+                    self._read_smakers[path] = sessionmaker(bind=get_read_engine(path), autocommit=False, autoflush=False)
+        return self._read_smakers[path]
+
+    def configure(self, persistent: bool) -> None:
+        if persistent != self.persistent:
+            self.dispose()
+            self.persistent = persistent
+
+    def dispose(self) -> None:
+        with self._mutex:
+            if self._smaker is not None:
+                self._smaker.remove()
+                self._smaker = None
+
+            if self._engine is not None:
+                self._engine.dispose()
+                self._engine = None
+
+            for read_smaker in self._read_smakers.values():
+                read_smaker.kw["bind"].dispose()
+            self._read_smakers = {}
+
+    # Connection modes ____________________________________________________________
+    @contextmanager
+    def writing(self, filelock=None):
+        """
+        Held around every use of the read-write engine. The write lock, when given, is
+        only taken once the read-only connections of this process are closed: a slow
+        stream must not keep other processes waiting on a lock that is not writing.
+        """
+        if self._read_only_threads[threading.get_ident()]:
+            raise RuntimeError("Cannot write while this thread has a read-only stream open")
+
+        with self._modes:
+            self._waiting_writers += 1
+            self._modes.wait_for(lambda: self._open["read_only"] == 0)
+
+        waiting = True
+
+        try:
+            # Still counted as waiting until the lock is taken, so no new reader opens
+            # a read-only connection meanwhile
+            with filelock if filelock is not None else nullcontext():
+                with self._modes:
+                    self._waiting_writers -= 1
+                    self._open["read_write"] += 1
+                    waiting = False
+
+                try:
+                    yield
+                finally:
+                    with self._modes:
+                        self._open["read_write"] -= 1
+                        self._modes.notify_all()
+        finally:
+            if waiting:
+                with self._modes:
+                    self._waiting_writers -= 1
+                    self._modes.notify_all()
+
+    @contextmanager
+    def reading(self):
+        """
+        Yields a session for a read: the live database when this process owns or is
+        writing to it, otherwise a read-only connection to the snapshot or the file.
+        """
+        if self.persistent:
+            yield from self._session(partial(self.smaker.session_factory, bind=self.bind))
+            return
+
+        if self._snapshot_current():
+            yield from self._session(self.read_smaker(self.snapshot))
+            return
+
+        # A writer would fail to open the file while readers hold it, so new readers
+        # hold back while some process has the write lock. Done before joining a
+        # mode, as a writer of this process waits for the read-only connections.
+        self._wait_for_writers()
+
+        owner = threading.get_ident()
+
+        with self._modes:
+            # Queued writers go first, or a steady flow of reads would starve them
+            self._modes.wait_for(lambda: self._open["read_write"] > 0 or self._waiting_writers == 0)
+            mode = "read_write" if self._open["read_write"] > 0 else "read_only"
+            self._open[mode] += 1
+
+            if mode == "read_only":
+                self._read_only_threads[owner] += 1
+
+        try:
+            if mode == "read_write":
+                yield from self._session(partial(self.smaker.session_factory, bind=self.bind))
+            else:
+                yield from self._session(self.read_smaker(DB_FILE))
+        finally:
+            with self._modes:
+                self._open[mode] -= 1
+
+                if mode == "read_only":
+                    self._read_only_threads[owner] -= 1
+                    if not self._read_only_threads[owner]:
+                        del self._read_only_threads[owner]
+
+                self._modes.notify_all()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Runs every operation of this thread in one transaction, committed when the block
+        exits unless rolled back through the yielded transaction, or on an exception.
+        Sessions join it: their commits are deferred to it, their rollbacks end it.
+        Needs a persistent connection, and the caller holding the write lock.
+        """
+        if not self.persistent:
+            raise RuntimeError("A transaction spanning operations needs a persistent connection")
+
+        with self.writing(), self.engine.connect() as connection:
+            transaction = connection.begin()
+            self._local.connection = connection
+
+            try:
+                yield transaction
+            except BaseException:
+                if transaction.is_active:
+                    transaction.rollback()
+                raise
+            else:
+                if transaction.is_active:
+                    transaction.commit()
+            finally:
+                self._local.connection = None
+
+        self.refresh_snapshot()
+
+    def _session(self, factory):
+        session = factory()
+
+        try:
+            self.connect(session)
+            yield session
+        finally:
+            session.close()
+
+    def _backoff(self, attempt: int) -> None:
+        backoff = random.uniform(0, min(BUSY_MAX_BACKOFF, BUSY_BACKOFF * 2 ** attempt))
+        recorder.record("connection", "busy_retry", backoff)
+        time.sleep(backoff)
+
+    def write_lock_held(self, delta: int) -> None:
+        with self._modes:
+            self._write_locks_held += delta
+
+    def _wait_for_writers(self) -> None:
+        # While this process holds the write lock no other one writes, and probing it
+        # would only wait on ourselves
+        if self._write_locks_held:
+            return
+
+        deadline = time.monotonic() + BUSY_TIMEOUT
+        attempt = 0
+
+        while time.monotonic() < deadline:
+            try:
+                self._write_probe.acquire()
+            except Timeout:
+                self._backoff(attempt)
+                attempt += 1
+            else:
+                self._write_probe.release()
+                return
+
+        # Tried anyway, connecting still retries if the writer holds the file
+
+    def connect(self, session: Session) -> None:
+        """
+        Open the session's connection, retrying while another process holds the file.
+        """
+        deadline = time.monotonic() + BUSY_TIMEOUT
+        attempt = 0
+
+        while True:
+            try:
+                session.connection()
+                return
+            except Exception as e:
+                session.close()
+                if not is_file_busy(e) or time.monotonic() >= deadline:
+                    raise e
+
+            self._backoff(attempt)
+            attempt += 1
+
+    # Snapshot ____________________________________________________________________
+    def _snapshot_current(self) -> bool:
+        # Read while it is younger than snapshot_interval, or older but the database has
+        # not changed since. Commits of this process not copied yet always go live.
+        if not self.snapshot or self._snapshot_behind:
+            return False
+
+        try:
+            copied = os.path.getmtime(self.snapshot)
+        except FileNotFoundError:
+            return False
+
+        if time.time() - copied < self.snapshot_interval:
+            return True
+
+        return all(os.path.getmtime(path) <= copied for path in (DB_FILE, f"{DB_FILE}.wal") if os.path.exists(path))
+
+    def reads_lag(self) -> bool:
+        """
+        Whether reads of this process are served from a snapshot that may miss commits.
+        """
+        if self.persistent or not self._snapshot_current():
+            return False
+
+        try:
+            copied = os.path.getmtime(self.snapshot)
+            return any(os.path.getmtime(path) > copied for path in (DB_FILE, f"{DB_FILE}.wal") if os.path.exists(path))
+        except FileNotFoundError:
+            return False  # The copy is gone, reads go to the live file
+
+    def refresh_snapshot(self, force: bool = False) -> None:
+        """
+        Replace the snapshot with a copy of the last committed state.
+        Called by writers after each commit, still holding the write lock, but only
+        copies when the snapshot is older than ``snapshot_interval`` or with ``force``.
+        A failed copy removes the snapshot, so reads go back to the live file.
+        """
+        # Inside a transaction, the copy is refreshed once it commits
+        if not self.snapshot or getattr(self._local, "connection", None) is not None:
+            return
+
+        if not force and os.path.exists(self.snapshot) and time.time() - os.path.getmtime(self.snapshot) < self.snapshot_interval:
+            self._snapshot_behind = True
+            return
+
+        copy_file = f"{self.snapshot}.{os.getpid()}.tmp"
+
+        with self._snapshot_mutex, recorder.measure("connection", "snapshot_refresh"):
+            try:
+                for stale in (copy_file, f"{copy_file}.wal"):
+                    if os.path.exists(stale):
+                        os.remove(stale)
+
+                # One transaction, so every table is copied as of the same commit. Rows
+                # only, constraints are not needed for reading, indexes are rebuilt.
+                with self.engine.begin() as connection:
+                    connection.exec_driver_sql(f"ATTACH '{copy_file}' AS snapshot_copy")
+
+                    for table in get_declarative_base().metadata.tables.values():
+                        connection.exec_driver_sql(f"CREATE TABLE snapshot_copy.{table.name} AS SELECT * FROM {table.name}")
+
+                        for index in table.indexes:
+                            columns = ", ".join(column.name for column in index.columns)
+                            connection.exec_driver_sql(f"CREATE INDEX {index.name} ON snapshot_copy.{table.name} ({columns})")
+
+                    connection.exec_driver_sql("DETACH snapshot_copy")
+
+                # Readers still holding the old copy keep it until they close
+                os.replace(copy_file, self.snapshot)
+                self._snapshot_behind = False
+
+            except Exception as e:
+                # Not to stdout, where a script run with --json writes its results
+                print(f"Could not refresh the snapshot, reading from the database: {e}", file=sys.stderr)
+                if os.path.exists(self.snapshot):
+                    os.remove(self.snapshot)
+
+connection_manager = ConnectionManager()
+
+# Schema management _______________________________________________________________
+def _add_transaction_indexes(connection) -> None:
+    for index in Transaction.__table__.indexes:
+        connection.execute(CreateIndex(index, if_not_exists=True))
+
+def _add_idempotency_keys(connection) -> None:
+    IdempotencyKey.__table__.create(bind=connection, checkfirst=True)
+
+def _add_change_log(connection) -> None:
+    ChangeLog.__table__.create(bind=connection, checkfirst=True)
+
+# Upgrade steps keyed by the version they bring the database to. Each receives an
+# open connection inside the migration transaction.
+MIGRATIONS = {
+    2: _add_transaction_indexes,
+    3: _add_idempotency_keys,
+    4: _add_change_log,
+}
+
+def get_schema_version(connection):
+    tables = {
+        row[0] for row in connection.execute(text(
+            "SELECT table_name FROM information_schema.tables WHERE table_schema = 'main'"
+        ))
+    }
     
-    sqa_base.metadata.reflect(bind=engine) # Load metadata 
+    if SchemaVersion.__tablename__ in tables:
+        return connection.execute(text(f"SELECT max(version) FROM {SchemaVersion.__tablename__}")).scalar()
     
-    return [engine, smaker]
+    # Databases created before versioning was introduced hold the first schema
+    return 1 if "clients" in tables else None
+
+def is_schema_current() -> bool:
+    # A plain read-only DuckDB connection: no engine, no write lock. Anything in the
+    # way (no file yet, a writer holding it, an older schema) means "not known to be"
+    try:
+        connection = duckdb.connect(DB_FILE, read_only=True)
+    except duckdb.Error:
+        return False
+
+    try:
+        return connection.execute(f"SELECT max(version) FROM {SchemaVersion.__tablename__}").fetchone()[0] == SCHEMA_VERSION
+    except duckdb.Error:
+        return False
+    finally:
+        connection.close()
+
+def ensure_schema(filelock: FileLock) -> bool:
+    """Create or migrate the schema only when the stored version is not current.
+
+    The common case, a current schema, is answered without the write lock or an
+    engine. Returns True when the schema was changed.
+    """
+    snapshot_missing = connection_manager.snapshot and not os.path.exists(connection_manager.snapshot)
+
+    if not snapshot_missing and is_schema_current():
+        return False
+
+    with connection_manager.writing(filelock):
+        with connection_manager.engine.begin() as connection:
+            stored_version = get_schema_version(connection)
+            
+            if stored_version == SCHEMA_VERSION:
+                if connection_manager.snapshot and not os.path.exists(connection_manager.snapshot):
+                    connection_manager.refresh_snapshot()
+                return False
+            
+            if stored_version is not None and stored_version > SCHEMA_VERSION:
+                raise RuntimeError(
+                    f"Database schema version {stored_version} is newer than this application ({SCHEMA_VERSION})"
+                )
+            
+            # Creates missing tables only, existing ones are left to the migrations
+            get_declarative_base().metadata.create_all(bind=connection)
+            
+            if stored_version is not None:
+                for version in range(stored_version + 1, SCHEMA_VERSION + 1):
+                    MIGRATIONS[version](connection)
+            
+            connection.execute(text(f"DELETE FROM {SchemaVersion.__tablename__}"))
+            connection.execute(
+                text(f"INSERT INTO {SchemaVersion.__tablename__} (version) VALUES (:version)"),
+                {"version": SCHEMA_VERSION}
+            )
+            
+        connection_manager.refresh_snapshot(force=True)  # The copy's tables are outdated
+        return True
+
+class TrackedWriteLock:
+    """A handler's write lock, telling the connection manager while this process holds it.
+
+    Reads made meanwhile, by the holder or another thread, do not probe the lock file:
+    only this process can be writing.
+    """
+    def __init__(self, filelock) -> None:
+        self.filelock = filelock
+
+    def __enter__(self):
+        self.filelock.__enter__()
+        connection_manager.write_lock_held(1)
+        return self
+
+    def __exit__(self, *exc_info):
+        connection_manager.write_lock_held(-1)
+        return self.filelock.__exit__(*exc_info)
+
+    def __getattr__(self, name: str):
+        return getattr(self.filelock, name)
 
 class OperationHandler:
+    # Place in the write-lock queue when given a LockScheduler
+    write_priority = MAINTENANCE_PRIORITY
+    # Times a write aborted by a concurrent one is run again, may be set per instance
+    conflict_retries = CONFLICT_RETRIES
+
     def __init__(self, filelock: FileLock) -> None:
+        if isinstance(filelock, LockScheduler):
+            filelock = filelock.with_priority(self.write_priority)
+        if filelock is not NO_WRITE_LOCK:
+            filelock = TrackedWriteLock(filelock)
         self.filelock = filelock
 
+# Write lock for handlers of a process that owns the database alone (the daemon, or a
+# script holding the FileLock) with a persistent connection. Each thread's session has
+# its own DuckDB connection, so writes touching different rows run concurrently and
+# DuckDB's MVCC aborts the later of two writes to the same row, which is retried.
+NO_WRITE_LOCK = nullcontext()
+
+def is_write_conflict(error: Exception) -> bool:
+    return isinstance(getattr(error, "orig", error), duckdb.TransactionException)
+
+# Every ORM flush appends its changes to the change log, in the same transaction
+event.listen(Session, "after_flush", record_flush)
+
 def write_operation(operation_func):
+    operation = operation_func.__qualname__
+
     @wraps(operation_func)
     def wrapper(self, *args, **kwargs):
         filelock = getattr(self, "filelock")
+        retries = getattr(self, "conflict_retries", CONFLICT_RETRIES)
+        smaker = connection_manager.smaker
 
-        engine, smaker = create_access()
-        
-        with filelock:
-            session = smaker()
-            
-            try:
-                # Evaluates if operation steps were correctly made
-                result = operation_func(self, *args, db_session=session, **kwargs)
-                session.commit()
-                
-            except Exception as e:
-                print(f"Something occured, rollbacking...: {e}")
-                session.rollback()
-                raise e
-            
-            finally:
-                smaker.remove()
-                
-        engine.dispose()
-                
-        return result
+        for attempt in range(retries + 1):
+            wait_start = time.perf_counter()
+
+            with connection_manager.writing(filelock):
+                hold_start = time.perf_counter()
+                recorder.record(operation, "lock_wait", hold_start - wait_start)
+                session = smaker(bind=connection_manager.bind)
+
+                try:
+                    # Readers of other processes may still hold the file, they let go soon
+                    connection_manager.connect(session)
+
+                    # Evaluates if operation steps were correctly made
+                    with recorder.measure(operation, "query"):
+                        result = operation_func(self, *args, db_session=session, **kwargs)
+                        session.commit()
+
+                    connection_manager.refresh_snapshot()
+                    return result
+
+                except Exception as e:
+                    session.rollback()
+
+                    # Only concurrent writers conflict, the operation is run again from scratch
+                    if not is_write_conflict(e):
+                        # Reporting the error is left to the caller
+                        recorder.record(operation, "rollback", time.perf_counter() - hold_start)
+                        raise e
+
+                    if attempt == retries:
+                        raise WriteConflictError(
+                            f"Concurrent writes to the same rows, gave up after {retries} retries"
+                        ) from e
+
+                finally:
+                    smaker.remove()  # Releases the connection, the engine is kept
+                    recorder.record(operation, "lock_hold", time.perf_counter() - hold_start)
+
+            backoff = random.uniform(0, min(CONFLICT_MAX_BACKOFF, CONFLICT_BACKOFF * 2 ** attempt))
+            recorder.record(operation, "conflict_retry", backoff)
+            time.sleep(backoff)
     return wrapper
 
 def read_operation(operation_func):
+    operation = operation_func.__qualname__
+
     @wraps(operation_func)
     def wrapper(self, *args, **kwargs):
-        engine, smaker = create_access()
-        session = smaker()
-        
-        result = operation_func(self, *args, db_session=session, **kwargs)
-        
-        smaker.remove()
-        engine.dispose()
-        
-        return result
-    return wrapper
\ No newline at end of file
+        # Takes no lock: a busy file is retried when connecting, see ConnectionManager.reading
+        with connection_manager.reading() as session, recorder.measure(operation, "query"):
+            return operation_func(self, *args, db_session=session, **kwargs)
+    return wrapper
+
+def stream_operation(operation_func):
+    """Read operation for generators: the session stays open while the caller iterates.
+
+    Uses its own session rather than the thread's scoped one, so other operations run
+    while iterating do not close it underneath the stream. Writes of this process wait
+    for a read-only stream to be closed.
+    """
+    @wraps(operation_func)
+    def wrapper(self, *args, **kwargs):
+        with connection_manager.reading() as session:
+            yield from operation_func(self, *args, db_session=session, **kwargs)
+    return wrapper
+
+def paginate(query, key_column, after_id: int = None, limit: int = None):
+    # Keyset pagination: resumes after the last key seen instead of counting an OFFSET
+    if after_id is not None:
+        query = query.filter(key_column > after_id)
+
+    query = query.order_by(key_column)
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    return query
+
+# Columnar output formats and the package DuckDB needs to produce each of them
+COLUMNAR_FORMATS = {"arrow": "pyarrow", "numpy": "numpy"}
+
+def select_columns(table, columns: list = None):
+    if columns is None:
+        return select(*table.columns)
+
+    unknown = set(columns) - set(table.columns.keys())
+    if unknown:
+        raise ValueError(f"Unknown columns for {table.name}: {', '.join(sorted(unknown))}")
+
+    return select(*(table.columns[name] for name in columns))
+
+def fetch_columnar(db_session: Session, statement, output: str = "arrow"):
+    """Run a Core select and fetch it through DuckDB's native columnar path.
+
+    Returns a ``pyarrow.Table`` for ``output="arrow"`` or a dict of NumPy arrays for
+    ``output="numpy"``, without building a Python object per row.
+    """
+    if output not in COLUMNAR_FORMATS:
+        raise ValueError(f"Invalid output format, expected one of: {', '.join(COLUMNAR_FORMATS)}")
+
+    if importlib.util.find_spec(COLUMNAR_FORMATS[output]) is None:
+        raise ImportError(f"{COLUMNAR_FORMATS[output]} must be installed to fetch {output} results")
+
+    result = db_session.connection().execute(statement)
+
+    try:
+        # The DB-API cursor is DuckDB's own connection, its pending result is still unread
+        if output == "arrow":
+            return result.cursor.fetch_arrow_table()
+        return result.cursor.fetchnumpy()
+    finally:
+        result.close()
@@ -0,0 +1,18 @@
+import random
+from typing import Iterator
+
+class RetryPolicy:
+    """Bounded retries with jittered exponential backoff.
+
+    ``delays`` yields the pause before each retry, drawn uniformly between zero and
+    ``base_delay * 2 ** retry`` (capped at ``max_delay``), so clients that failed
+    together do not come back together.
+    """
+    def __init__(self, attempts: int = 3, base_delay: float = 0.01, max_delay: float = 1.0) -> None:
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delays(self) -> Iterator[float]:
+        for retry in range(self.attempts):
+            yield random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
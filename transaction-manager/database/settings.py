@@ -0,0 +1,23 @@
+import os
+
+# Read from the environment once, without loading the database layer, so light
+# modules (the daemon client) can use the paths as well
+
+DB_PATH = os.getenv("DATABASE_PATH")
+if not DB_PATH:
+    raise EnvironmentError("DATABASE_PATH environment variable is not set")
+
+DB_FILE = os.path.realpath(DB_PATH)
+LOCK_FILE = f"{DB_FILE}.lock"
+
+# Optional copy of the database refreshed by the writers. Reads use it when set, so
+# they never wait on the file of a writer. Every process writing to the database must
+# set it, or the copy falls behind.
+SNAPSHOT_FILE = os.getenv("DATABASE_SNAPSHOT")
+
+# A refresh copies every table and rebuilds every index while holding the write lock,
+# so it costs as much as the database is large. A commit refreshes the copy only when
+# it is older than this many seconds (0 refreshes after every commit). Meanwhile reads
+# of the committing process, and reads of any process once the database has changed
+# this long after the copy, go to the live file.
+SNAPSHOT_INTERVAL = float(os.getenv("DATABASE_SNAPSHOT_INTERVAL", "1.0"))
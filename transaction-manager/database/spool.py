@@ -0,0 +1,316 @@
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from typing import List, Tuple
+from filelock import FileLock, Timeout
+from sqlalchemy.exc import DatabaseError, OperationalError
+
+from database.operations import WriteConflictError
+from database.settings import DB_FILE
+from database.transaction import TransactionHandler
+
+SPOOL_FILE = os.getenv("TRANSACTION_SPOOL", f"{DB_FILE}.spool")
+# Outcomes are kept for this many seconds, and at most this many, before they expire
+OUTCOME_TTL = float(os.getenv("TRANSACTION_SPOOL_OUTCOME_TTL", "86400"))
+MAX_OUTCOMES = int(os.getenv("TRANSACTION_SPOOL_MAX_OUTCOMES", "10000"))
+# Applied records left in the spool file before it is rewritten with only the pending ones
+COMPACT_AFTER = 1000
+# A drainer failing on every round reports it once per interval
+FAILURE_REPORT_INTERVAL = 60.0
+
+class TransactionSpool:
+    """Local spool of transaction requests, applied later in batches.
+
+    ``submit`` authenticates the request right away (bcrypt runs outside the write lock
+    anyway), appends it to the spool file without its password and returns a ticket.
+    A drainer applies pending requests through the handler's verified path, so the
+    account versions checked at submission are checked again when the balance moves.
+    Each ticket is also the idempotency key of its request: a crash between the commit
+    and recording the outcome cannot apply a request twice. Outcomes are appended to
+    ``<spool>.outcomes`` and survive restarts along with the pending requests.
+
+    Both files are appended to and, once ``compact_after`` applied requests pile up,
+    rewritten by the drainer: the spool keeps only pending requests, and outcomes
+    older than ``outcome_ttl`` seconds or beyond the newest ``max_outcomes`` expire.
+    """
+    def __init__(self, handler: TransactionHandler, path: str = SPOOL_FILE, batch_size: int = 100, interval: float = 0.5, fsync: bool = True, outcome_ttl: float = OUTCOME_TTL, max_outcomes: int = MAX_OUTCOMES, compact_after: int = COMPACT_AFTER) -> None:
+        self.handler = handler
+        self.path = path
+        self.outcomes_path = f"{path}.outcomes"
+        self.batch_size = batch_size
+        self.interval = interval
+        self.fsync = fsync
+        self.outcome_ttl = outcome_ttl
+        self.max_outcomes = max_outcomes
+        self.compact_after = compact_after
+        # Only one drainer per spool, across processes
+        self._drain_lock = FileLock(f"{path}.lock", timeout=0)
+        # Appends and compactions of both files, across processes
+        self._write_lock = FileLock(f"{path}.write.lock")
+        self._mutex = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._failures = 0
+        self._failure_reported = None
+        # Each file is read once from where we stopped, until a compaction replaces it.
+        # A file is told apart by its first line, compactions start theirs with a header.
+        self._offsets = {self.path: 0, self.outcomes_path: 0}
+        self._first_lines = {self.path: None, self.outcomes_path: None}
+        self._records = 0  # Records read from the current spool file
+        self._pending = {}
+        self._outcomes = {}
+        self._refresh()
+
+    def _tail(self, path: str) -> Tuple[List[dict], bool]:
+        """
+        Returns the records added to the file since the last read, and whether the
+        file was replaced by a compaction, in which case they are all of its records.
+        """
+        if not os.path.exists(path):
+            return [], False
+
+        with open(path, "rb") as spool_file:
+            first_line = spool_file.readline()
+            replaced = first_line != self._first_lines[path]
+            if replaced:
+                self._first_lines[path] = first_line
+                self._offsets[path] = 0
+
+            spool_file.seek(self._offsets[path])
+            lines = spool_file.readlines()
+
+        # A line still being written by another process is left for the next read
+        if lines and not lines[-1].endswith(b"\n"):
+            lines.pop()
+
+        self._offsets[path] += sum(len(line) for line in lines)
+        records = [json.loads(line) for line in lines if line.strip()]
+        return [record for record in records if "ticket" in record], replaced
+
+    def _read(self) -> None:
+        outcomes, replaced = self._tail(self.outcomes_path)
+        if replaced:
+            self._outcomes = {}
+
+        for outcome in outcomes:
+            self._outcomes[outcome["ticket"]] = outcome
+            self._pending.pop(outcome["ticket"], None)
+
+        records, replaced = self._tail(self.path)
+        if replaced:
+            self._pending = {}
+            self._records = 0
+
+        self._records += len(records)
+        for record in records:
+            if record["ticket"] not in self._outcomes:
+                self._pending[record["ticket"]] = record
+
+    def _refresh(self) -> None:
+        with self._mutex:
+            self._read()
+
+    def _write(self, spool_file, records: List[dict]) -> None:
+        spool_file.write("".join(json.dumps(record, default=str) + "\n" for record in records))
+        spool_file.flush()
+        if self.fsync:
+            os.fsync(spool_file.fileno())
+
+    def _append(self, path: str, records: List[dict]) -> None:
+        with self._mutex, self._write_lock, open(path, "a") as spool_file:
+            self._write(spool_file, records)
+
+    def _rewrite(self, path: str, records: List[dict]) -> None:
+        header = {"compacted": uuid.uuid4().hex, "at": time.time()}
+
+        with open(f"{path}.tmp", "w") as spool_file:
+            self._write(spool_file, [header, *records])
+            # Read on from the end, the records are already in memory
+            self._first_lines[path] = (json.dumps(header) + "\n").encode()
+            self._offsets[path] = spool_file.tell()
+
+        os.replace(f"{path}.tmp", path)
+
+    # Submission __________________________________________________________________
+    def submit(self, transaction_type: str, amount: float, payer_id: int = None, receiver_id: int = None, password: str = None, payer_version: int = None, receiver_version: int = None) -> str:
+        request = {
+            "transaction_type": transaction_type,
+            "amount": amount,
+            "payer_id": payer_id,
+            "receiver_id": receiver_id,
+            "password": password,
+            "payer_version": payer_version,
+            "receiver_version": receiver_version
+        }
+
+        errors = self.handler.verify_transactions([request])
+        if errors:
+            raise errors[0]
+
+        ticket = uuid.uuid4().hex
+        del request["password"]  # Never written to disk
+        request["idempotency_key"] = ticket
+
+        self._append(self.path, [{"ticket": ticket, "request": request, "submitted": time.time()}])
+        return ticket
+
+    def status(self, ticket: str) -> dict:
+        """
+        Returns the recorded outcome of a ticket, ``{"status": "pending"}`` while it waits,
+        or ``{"status": "unknown"}`` for a ticket never submitted or whose outcome expired.
+        """
+        if ticket not in self._outcomes:
+            self._refresh()  # Maybe submitted or drained by another process
+
+        with self._mutex:
+            if ticket in self._outcomes:
+                return self._outcomes[ticket]
+            if ticket in self._pending:
+                return {"ticket": ticket, "status": "pending"}
+
+        return {"ticket": ticket, "status": "unknown"}
+
+    def pending(self) -> List[dict]:
+        self._refresh()
+
+        with self._mutex:
+            return list(self._pending.values())
+
+    # Draining ____________________________________________________________________
+    def drain(self) -> int:
+        """
+        Apply every pending request, a batch per write operation.
+        Returns how many requests got an outcome. Requests stay pending when another
+        drainer holds the spool or the database write lock cannot be taken in time.
+        A request the database refuses gets an error outcome, the others still apply.
+        """
+        try:
+            self._drain_lock.acquire()
+        except Timeout:
+            return 0
+
+        drained = 0
+
+        try:
+            pending = self.pending()
+
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start:start + self.batch_size]
+
+                results = self._apply([record["request"] for record in batch])
+
+                outcomes = []
+                for result in results:
+                    outcome = {"ticket": batch[result["index"]]["ticket"], "status": result["status"], "completed": time.time()}
+                    if result["status"] == "ok":
+                        outcome["transaction"] = result["transaction"]
+                    else:
+                        outcome["error"] = result["error"]
+                    outcomes.append(outcome)
+
+                if outcomes:
+                    self._append(self.outcomes_path, outcomes)
+                    self._refresh()
+                    drained += len(outcomes)
+
+                if len(results) < len(batch):
+                    break  # The writer is busy, try again on the next round
+
+            self.compact()
+
+        finally:
+            self._drain_lock.release()
+
+        return drained
+
+    def _apply(self, requests: List[dict]) -> List[dict]:
+        # Returns a result per request applied, fewer when the writer got busy midway
+        try:
+            return self.handler.apply_verified_transactions(requests)
+        except (Timeout, WriteConflictError):
+            return []
+        except OperationalError:
+            raise  # The database itself is unavailable, reported and retried by the drainer
+        except DatabaseError:
+            pass  # A request the database refuses fails the whole write
+
+        # One write per request, so only the refused ones fail
+        results = []
+
+        for index, request in enumerate(requests):
+            try:
+                result = self.handler.apply_verified_transactions([request])[0]
+            except (Timeout, WriteConflictError):
+                break
+            except OperationalError:
+                raise
+            except DatabaseError as e:
+                result = {"status": "error", "error": str(e.orig)}
+
+            results.append({**result, "index": index})
+
+        return results
+
+    def compact(self) -> None:
+        """
+        Rewrite the spool without its applied requests, and the outcomes without the
+        expired ones, once ``compact_after`` applied requests are left in the spool.
+        Called by the drainer, which holds the spool.
+        """
+        with self._mutex, self._write_lock:
+            self._read()
+            oldest = next(iter(self._outcomes.values()), None)
+            expired = oldest is not None and oldest["completed"] < time.time() - self.outcome_ttl
+
+            if not expired and len(self._outcomes) <= self.max_outcomes and self._records - len(self._pending) < self.compact_after:
+                return
+
+            # The spool goes first: a request must not outlive its outcome
+            self._rewrite(self.path, list(self._pending.values()))
+            self._records = len(self._pending)
+
+            # Outcomes are appended as requests complete, so the oldest come first
+            deadline = time.time() - self.outcome_ttl
+            kept = [outcome for outcome in self._outcomes.values() if outcome["completed"] >= deadline]
+            kept = kept[max(len(kept) - self.max_outcomes, 0):]
+            self._rewrite(self.outcomes_path, kept)
+            self._outcomes = {outcome["ticket"]: outcome for outcome in kept}
+
+    def start(self) -> "TransactionSpool":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            stopping = self._stop.is_set()  # One last round after stop, so a clean shutdown leaves nothing behind
+
+            try:
+                self.drain()
+            except Exception as e:
+                self._report_failure(e)
+
+            if stopping:
+                return
+            self._stop.wait(self.interval)
+
+    def _report_failure(self, error: Exception) -> None:
+        # Runs on the drainer thread, keep a failing database from flooding the prompt
+        self._failures += 1
+        if self._failure_reported is not None and time.monotonic() - self._failure_reported < FAILURE_REPORT_INTERVAL:
+            return
+
+        print(f"Spool drain failed {self._failures} time(s), retrying: {error}", file=sys.stderr)
+        self._failures = 0
+        self._failure_reported = time.monotonic()
@@ -0,0 +1,78 @@
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Recent samples kept per operation and phase, percentiles are computed over them
+MAX_SAMPLES = 10000
+
+def _percentile(ordered: list, fraction: float) -> float:
+    # Nearest-rank percentile of an already sorted list
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+class LatencyRecorder:
+    """Process-wide latency samples broken down by operation and phase.
+
+    Phases recorded by the operation decorators are ``lock_wait`` (waiting for the
+    write lock), ``lock_hold`` (time the lock was held), ``query`` (the operation
+    body and its commit) and ``rollback`` (a failed write, up to its rollback).
+    Handlers add their own phases, such as ``bcrypt``. Each phase keeps its total
+    count and its most recent ``max_samples`` durations.
+    """
+    def __init__(self, max_samples: int = MAX_SAMPLES) -> None:
+        self.max_samples = max_samples
+        self._samples = {}
+        self._counts = {}
+        self._mutex = threading.Lock()
+
+    def record(self, operation: str, phase: str, seconds: float) -> None:
+        key = (operation, phase)
+
+        with self._mutex:
+            if key not in self._samples:
+                self._samples[key] = deque(maxlen=self.max_samples)
+                self._counts[key] = 0
+
+            self._samples[key].append(seconds)
+            self._counts[key] += 1
+
+    @contextmanager
+    def measure(self, operation: str, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(operation, phase, time.perf_counter() - start)
+
+    def snapshot(self) -> dict:
+        """
+        Returns ``{operation: {phase: {"count", "p50_ms", "p95_ms", "p99_ms", "max_ms"}}}``.
+        """
+        with self._mutex:
+            samples = {key: sorted(values) for key, values in self._samples.items()}
+            counts = dict(self._counts)
+
+        stats = {}
+
+        for (operation, phase), ordered in sorted(samples.items()):
+            stats.setdefault(operation, {})[phase] = {
+                "count": counts[(operation, phase)],
+                "p50_ms": round(_percentile(ordered, 0.50) * 1000, 3),
+                "p95_ms": round(_percentile(ordered, 0.95) * 1000, 3),
+                "p99_ms": round(_percentile(ordered, 0.99) * 1000, 3),
+                "max_ms": round(ordered[-1] * 1000, 3),
+            }
+
+        return stats
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def reset(self) -> None:
+        with self._mutex:
+            self._samples.clear()
+            self._counts.clear()
+
+recorder = LatencyRecorder()
@@ -1,66 +1,238 @@
+import math
+import threading
+import time
+from concurrent.futures import Executor
 from multiprocessing import Value
-from typing import List
+from typing import Iterator, List
 
 import bcrypt
-from database.operations import OperationHandler, read_operation, write_operation
+from filelock import FileLock
+from database.cache import RowCache
+from database.changes import record_changes
+from database.credentials import CredentialCache
+from database.retry import RetryPolicy
+from database.scheduler import TRANSACTION_PRIORITY
+from database.stats import recorder
+from database.operations import OperationHandler, WriteConflictError, read_operation, write_operation, stream_operation, paginate, fetch_columnar, select_columns
+from sqlalchemy import and_, case, func, insert, literal_column, or_, select, union, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from database.table_model import Transaction, BankAccount
+from database.table_model import Transaction, BankAccount, IdempotencyKey
 from datetime import datetime, timezone
 
+# Request types stored under a different name in Transaction.transaction_type
+RECORDED_TYPES = {"transaction": "transfer"}
 
+# Amounts are stored in a BIGINT column
+MAX_AMOUNT = 2 ** 63 - 1
+
+ACCOUNTS = BankAccount.__table__
+TRANSACTIONS = Transaction.__table__
+IDEMPOTENCY_KEYS = IdempotencyKey.__table__
+
+class VersionMismatchError(ValueError):
+    """A request carried an account version that another writer already replaced."""
+
+def check_password(password: str, hashed: str) -> bool:
+    # Module level so it can be shipped to a process pool
+    return bcrypt.checkpw(password.encode(), hashed.encode())
+
+
+# Balance updates are conditional: DuckDB answers an UPDATE with the number of rows it
+# changed, so a statement that matched nothing tells us a check failed. RETURNING is
+# avoided on purpose, DuckDB rewrites it as delete + insert which trips the foreign keys.
 class TransactionHandler(OperationHandler):
-    def _handle_deposit(self, amount: float, receiver_id: int, password: str, db_session: Session):
-        if not receiver_id or not password:
-            raise ValueError("Receiver ID and password are required for deposit")
-            
-        receiver = db_session.query(BankAccount).filter_by(id=receiver_id).first()
+    # Latency sensitive, queued ahead of account and client maintenance
+    write_priority = TRANSACTION_PRIORITY
+    
+    def __init__(self, filelock: FileLock, hash_executor: Executor = None, credential_cache: CredentialCache = None, retry_policy: RetryPolicy = None, row_cache: RowCache = None) -> None:
+        super().__init__(filelock)
+        # Optional thread or process pool running bcrypt checks, always outside the lock
+        self.hash_executor = hash_executor
+        # Optional cache of recent successful checks, skips bcrypt for hot accounts
+        self.credential_cache = credential_cache
+        # Optional retries of create_transaction with the current account versions
+        self.retry_policy = retry_policy
+        # Optional cache of account rows, spares re-reading the same accounts on every request
+        self.row_cache = row_cache
+        self.retries = 0
+        self.give_ups = 0
+        self._counter_mutex = threading.Lock()
+
+    def _credential_owner(self, request: dict) -> tuple:
+        # Returns the account whose password authorizes the request and its role
+        transaction_type = request.get("transaction_type")
         
-        if not receiver:
-            raise ValueError("Invalid receiver ID")
+        if transaction_type not in ["deposit", "withdrawal", "transaction"]:
+            raise ValueError("Invalid transaction type")
+        
+        if transaction_type == "deposit":
+            if not request.get("receiver_id") or not request.get("password"):
+                raise ValueError("Receiver ID and password are required for deposit")
+            return request["receiver_id"], "Receiver"
         
-        if not bcrypt.checkpw(password.encode(), receiver.password.encode()):
-            raise ValueError("Invalid password for transaction")
+        if transaction_type == "withdrawal":
+            if not request.get("payer_id") or not request.get("password"):
+                raise ValueError("Payer ID and password are required for withdrawal")
+            return request["payer_id"], "Payer"
         
-        receiver.balance += amount
+        if not request.get("payer_id") or not request.get("receiver_id") or not request.get("password"):
+            raise ValueError("Payer ID, receiver ID, and password are required for transaction")
+        return request["payer_id"], "Payer"
+
+    def _load_credentials(self, account_ids: List[int]) -> dict:
+        if self.row_cache is None:
+            return self._read_accounts(account_ids)
+        return self.row_cache.get_many("account", account_ids, self._read_accounts)
+
+    @read_operation
+    def _read_accounts(self, account_ids: List[int], db_session: Session = None) -> dict:
+        # Every account at once, as AccountHandler.get_account returns them (no balance)
+        rows = db_session.execute(
+            select(ACCOUNTS.c.id, ACCOUNTS.c.owner, ACCOUNTS.c.password, ACCOUNTS.c.version).where(ACCOUNTS.c.id.in_(account_ids))
+        ).all()
+        return {row.id: dict(row._mapping) for row in rows}
+
+    def _check_amount(self, request: dict) -> None:
+        # A negative deposit would pass the conditional updates, an oversized one would
+        # only fail under the lock and take the rest of the batch with it
+        amount = request.get("amount")
+        
+        if isinstance(amount, bool) or not isinstance(amount, (int, float)):
+            raise ValueError("Amount must be a number")
+        if not math.isfinite(amount) or amount <= 0 or amount != int(amount):
+            raise ValueError("Amount must be a positive whole number")
+        if amount > MAX_AMOUNT:
+            raise ValueError(f"Amount must not exceed {MAX_AMOUNT}")
 
-    def _handle_withdrawal(self, amount: float, payer_id: int, password: str, db_session: Session):
-        if not payer_id or not password:
-            raise ValueError("Payer ID and password are required for withdrawal")
+    def _prepare_verification(self, request: dict, credentials: dict) -> tuple:
+        # Runs every cheap check and returns what is left to verify with bcrypt
+        self._check_amount(request)
+        account_id, role = self._credential_owner(request)
+        account = credentials.get(account_id)
         
-        payer = db_session.query(BankAccount).filter_by(id=payer_id).first()
+        if not account:
+            raise ValueError("Invalid receiver ID" if role == "Receiver" else "Invalid payer ID or password")
         
-        if not payer:
-            raise ValueError("Invalid payer ID or password")
+        if account["version"] != request.get(f"{role.lower()}_version"):
+            raise VersionMismatchError(f"{role} account version mismatch")
         
-        if not bcrypt.checkpw(password.encode(), payer.password.encode()):
-            raise ValueError("Invalid password for transaction")
+        return account_id, account["version"], request["password"], account["password"]
+
+    def _check_passwords(self, pairs: List[tuple]) -> List[bool]:
+        if not pairs:
+            return []
         
-        if payer.balance < amount:
-            raise ValueError("Insufficient funds")
+        if self.hash_executor is None:
+            return [check_password(password, hashed) for password, hashed in pairs]
         
-        payer.balance -= amount
+        passwords, hashes = zip(*pairs)
+        return list(self.hash_executor.map(check_password, passwords, hashes))
 
-    def _handle_transaction(self, amount: float, payer_id: int, receiver_id: int, password: str, db_session: Session):
-        if not payer_id or not receiver_id or not password:
-            raise ValueError("Payer ID, receiver ID, and password are required for transaction")
+    def _verify_requests(self, requests: List[dict]) -> dict:
+        """
+        Authenticate requests without holding the write lock.
+        Returns the error of each rejected request by index. The versions verified here
+        are checked again by the balance updates, so a password changed in between
+        (which bumps the account version) makes the request fail instead of slipping through.
+        """
+        credentials = self._load_credentials(list({
+            account_id for request in requests for account_id in (request.get("payer_id"), request.get("receiver_id"))
+            if account_id is not None
+        }))
+        
+        errors, pending = {}, []
+        cache = self.credential_cache
+        
+        for index, request in enumerate(requests):
+            try:
+                account_id, version, password, hashed = self._prepare_verification(request, credentials)
+            except ValueError as e:
+                errors[index] = e
+                continue
+            
+            if cache is None or not cache.is_verified(account_id, version, password):
+                pending.append((index, account_id, version, password, hashed))
+        
+        with recorder.measure("TransactionHandler.verify_requests", "bcrypt"):
+            checks = self._check_passwords([(password, hashed) for _, _, _, password, hashed in pending])
+        
+        for (index, account_id, version, password, _), valid in zip(pending, checks):
+            if not valid:
+                errors[index] = ValueError("Invalid password for transaction")
+            elif cache is not None:
+                cache.remember(account_id, version, password)
         
-        payer = db_session.query(BankAccount).filter_by(id=payer_id).first()
-        receiver = db_session.query(BankAccount).filter_by(id=receiver_id).first()
+        return errors
+
+    def _rejection(self, amount: float, payer_id: int, payer_version: int, receiver_id: int, receiver_version: int, db_session: Session) -> ValueError:
+        # Only runs after a conditional update matched nothing, to report why
+        rows = db_session.execute(
+            select(ACCOUNTS.c.id, ACCOUNTS.c.balance, ACCOUNTS.c.version).where(ACCOUNTS.c.id.in_([payer_id, receiver_id]))
+        ).all()
+        accounts = {row.id: row for row in rows}
         
-        if not payer:
-            raise ValueError("Invalid payer ID or password")
+        if payer_id is not None:
+            if payer_id not in accounts:
+                return ValueError("Invalid payer ID or password")
+            if accounts[payer_id].version != payer_version:
+                return VersionMismatchError("Payer account version mismatch")
         
-        if not receiver:
-            raise ValueError("Invalid receiver ID")
+        if receiver_id is not None:
+            if receiver_id not in accounts:
+                return ValueError("Invalid receiver ID")
+            if accounts[receiver_id].version != receiver_version:
+                return VersionMismatchError("Receiver account version mismatch")
         
-        if not bcrypt.checkpw(password.encode(), payer.password.encode()):
-            raise ValueError("Invalid password for transaction")
+        return ValueError("Insufficient funds")
+
+    def _handle_deposit(self, amount: float, receiver_id: int, receiver_version: int, db_session: Session):
+        credited = db_session.execute(
+            update(ACCOUNTS)
+            .where(ACCOUNTS.c.id == receiver_id, ACCOUNTS.c.version == receiver_version)
+            .values(balance=ACCOUNTS.c.balance + amount)
+        ).scalar()
         
-        if payer.balance < amount:
-            raise ValueError("Insufficient funds")
+        if credited != 1:
+            raise self._rejection(amount, None, None, receiver_id, receiver_version, db_session)
+
+    def _handle_withdrawal(self, amount: float, payer_id: int, payer_version: int, db_session: Session):
+        # Funds and version are checked by the same statement that debits
+        debited = db_session.execute(
+            update(ACCOUNTS)
+            .where(ACCOUNTS.c.id == payer_id, ACCOUNTS.c.version == payer_version, ACCOUNTS.c.balance >= amount)
+            .values(balance=ACCOUNTS.c.balance - amount)
+        ).scalar()
         
-        payer.balance -= amount
-        receiver.balance += amount
+        if debited != 1:
+            raise self._rejection(amount, payer_id, payer_version, None, None, db_session)
+
+    def _handle_transaction(self, amount: float, payer_id: int, receiver_id: int, payer_version: int, receiver_version: int, db_session: Session):
+        if payer_id == receiver_id:
+            raise ValueError("Payer and receiver must be different accounts")
+        
+        def movable(table):
+            return or_(
+                and_(table.c.id == payer_id, table.c.version == payer_version, table.c.balance >= amount),
+                and_(table.c.id == receiver_id, table.c.version == receiver_version),
+            )
+        
+        # Debit and credit in one statement, applied only when both rows qualify
+        eligible = ACCOUNTS.alias("eligible")
+        moved = db_session.execute(
+            update(ACCOUNTS)
+            .where(
+                movable(ACCOUNTS),
+                select(func.count()).select_from(eligible).where(movable(eligible)).scalar_subquery() == 2
+            )
+            .values(balance=case(
+                (ACCOUNTS.c.id == payer_id, ACCOUNTS.c.balance - amount),
+                else_=ACCOUNTS.c.balance + amount
+            ))
+        ).scalar()
+        
+        if moved != 2:
+            raise self._rejection(amount, payer_id, payer_version, receiver_id, receiver_version, db_session)
 
     # Read operations _____________________________________________________________
     @read_operation
@@ -74,67 +246,290 @@ class TransactionHandler(OperationHandler):
             "version": transaction.version
         }
 
-    @read_operation
-    def list_transactions(self, account_id: int = None, db_session: Session = None) -> List[Transaction]:
+    def _account_history(self, base_select, account_id: int, after_id: int, limit: int):
+        # Two lookups served by the payer and receiver indexes, an OR across both
+        # columns would scan the whole ledger
+        sides = [
+            base_select.where(Transaction.payer == account_id),
+            base_select.where(Transaction.receiver == account_id)
+        ]
+        if after_id is not None:
+            sides = [side.where(Transaction.id > after_id) for side in sides]
+        
+        history = union(*sides).order_by(literal_column("id"))
+        if limit is not None:
+            history = history.limit(limit)
+        
+        return history
+
+    def _history_query(self, account_id: int, after_id: int, limit: int, db_session: Session):
         query = db_session.query(Transaction)
+        if not account_id:
+            return paginate(query, Transaction.id, after_id, limit)
+        
+        return query.from_statement(self._account_history(select(Transaction), account_id, after_id, limit))
+
+    @read_operation
+    def list_transactions(self, account_id: int = None, after_id: int = None, limit: int = None, db_session: Session = None) -> List[Transaction]:
+        return self._history_query(account_id, after_id, limit, db_session).all()
+
+    @read_operation
+    def fetch_transactions(self, account_id: int = None, columns: List[str] = None, output: str = "arrow", db_session: Session = None):
+        statement = select_columns(TRANSACTIONS, columns)
+        
         if account_id:
-            query = query.filter((Transaction.payer == account_id) | (Transaction.receiver == account_id))
-        return query.all()
+            if columns is not None and "id" not in columns:
+                raise ValueError("Account history needs the id column to order and deduplicate rows")
+            statement = self._account_history(statement, account_id, None, None)
+        else:
+            statement = statement.order_by(TRANSACTIONS.c.id)
+        
+        return fetch_columnar(db_session, statement, output)
 
-    # Write operations ____________________________________________________________
-    @write_operation
-    def create_transaction(self, transaction_type: str, amount: float, payer_id: int = None, receiver_id: int = None, password: str = None, payer_version: int = None, receiver_version: int = None, db_session: Session = None):
-        if transaction_type not in ["deposit", "withdrawal", "transaction"]:
-            raise ValueError("Invalid transaction type")
+    @stream_operation
+    def iter_transactions(self, account_id: int = None, after_id: int = None, batch_size: int = 1000, db_session: Session = None) -> Iterator[Transaction]:
+        yield from self._history_query(account_id, after_id, None, db_session).yield_per(batch_size)
 
-        if transaction_type == "deposit":
-            receiver = db_session.query(BankAccount).filter_by(id=receiver_id).first()
+    # Write operations ____________________________________________________________
+    def create_transaction(self, transaction_type: str, amount: float, payer_id: int = None, receiver_id: int = None, password: str = None, payer_version: int = None, receiver_version: int = None, idempotency_key: str = None):
+        """
+        Apply a single transaction request.
+        With a retry_policy, a version mismatch is retried with the current account versions
+        after a backoff; every other rejection is raised right away.
+        A request repeating an idempotency_key already applied returns the original
+        transaction instead of applying it again.
+        """
+        request = {
+            "transaction_type": transaction_type,
+            "amount": amount,
+            "payer_id": payer_id,
+            "receiver_id": receiver_id,
+            "password": password,
+            "payer_version": payer_version,
+            "receiver_version": receiver_version,
+            "idempotency_key": idempotency_key
+        }
+        
+        delays = self.retry_policy.delays() if self.retry_policy is not None else iter(())
+        
+        while True:
+            try:
+                return self._create_verified(request)
             
-            if receiver.version != receiver_version:
-                raise ValueError("Receiver account version mismatch")
+            except VersionMismatchError:
+                delay = next(delays, None)
+                
+                if delay is None:
+                    if self.retry_policy is not None:
+                        self._count("give_ups")
+                    raise
+                
+                self._count("retries")
+                time.sleep(delay)
+                request = self._with_current_versions(request)
+    
+    def _create_verified(self, request: dict) -> dict:
+        # A retry of an applied request is answered without bcrypt or the write lock
+        if request.get("idempotency_key") is not None:
+            applied = self._find_applied(request)
+            if applied is not None:
+                return applied
+        
+        # The slow bcrypt check happens before the lock, only the balance change runs under it
+        errors = self._verify_requests([request])
+        if errors:
+            raise errors[0]
+        
+        try:
+            return self._apply_verified([(0, request)], atomic=True)[0]["transaction"]
+        
+        except (IntegrityError, WriteConflictError):
+            # Without a write lock, a request with the same key can commit between our
+            # replay check and our insert of the key: answer with its transaction
+            if request.get("idempotency_key") is None:
+                raise
             
-            self._handle_deposit(amount, receiver_id, password, db_session)
+            applied = self._find_applied(request)
+            if applied is None:
+                raise
+            return applied
+    
+    def _with_current_versions(self, request: dict) -> dict:
+        # The retried request is verified again from scratch, so the password is checked
+        # against the current hash and the funds against the current balance
+        credentials = self._load_credentials([
+            account_id for account_id in (request["payer_id"], request["receiver_id"]) if account_id is not None
+        ])
+        request = dict(request)
         
-        elif transaction_type == "withdrawal":
-            payer = db_session.query(BankAccount).filter_by(id=payer_id).first()
+        for role in ("payer", "receiver"):
+            account = credentials.get(request[f"{role}_id"])
+            if account is not None:
+                request[f"{role}_version"] = account["version"]
+        
+        return request
+    
+    def _count(self, counter: str) -> None:
+        with self._counter_mutex:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def create_transactions(self, requests: List[dict], atomic: bool = True) -> List[dict]:
+        """
+        Apply many transaction requests under one lock acquisition and one commit.
+        Each request holds the keyword arguments of create_transaction.
+        With atomic=True the first invalid request rolls back the whole batch, otherwise
+        invalid requests are reported in their result and the others are still applied.
+        """
+        errors = self._verify_requests(requests)
+        
+        if atomic and errors:
+            index = min(errors)
+            raise ValueError(f"Batch request {index} failed: {errors[index]}") from errors[index]
+        
+        results = [{"index": index, "status": "error", "error": str(e)} for index, e in errors.items()]
+        verified = [(index, request) for index, request in enumerate(requests) if index not in errors]
+        
+        if verified:
+            try:
+                results += self._apply_verified(verified, atomic=atomic)
+            except IntegrityError:
+                # A concurrent request committed one of the keys, see _create_verified.
+                # Run once more, the replay check under the lock now answers it
+                if all(request.get("idempotency_key") is None for _, request in verified):
+                    raise
+                results += self._apply_verified(verified, atomic=atomic)
+        
+        return sorted(results, key=lambda result: result["index"])
+
+    def verify_transactions(self, requests: List[dict]) -> dict:
+        """
+        Authenticate requests without applying them, for callers applying them later
+        without their passwords through apply_verified_transactions.
+        Returns the error of each rejected request by index.
+        """
+        return self._verify_requests(requests)
+
+    def apply_verified_transactions(self, requests: List[dict]) -> List[dict]:
+        """
+        Apply requests accepted earlier by verify_transactions in one write, each with its
+        own result as in create_transactions(atomic=False). The account versions verified
+        then are checked again, so a password changed in between fails the request.
+        """
+        return self._apply_verified(list(enumerate(requests)), atomic=False)
+
+    @write_operation
+    def _apply_verified(self, indexed_requests: List[tuple], atomic: bool, db_session: Session = None) -> List[dict]:
+        results = []
+        
+        for index, request in indexed_requests:
+            try:
+                # Checked again under the lock, a concurrent retry may have applied it meanwhile
+                transaction = self._replay(request, db_session)
+                if transaction is not None:
+                    results.append({"index": index, "status": "ok", "transaction": transaction})
+                    continue
+                
+                transaction = self._apply_transaction(
+                    request["transaction_type"],
+                    request["amount"],
+                    request.get("payer_id"),
+                    request.get("receiver_id"),
+                    request.get("payer_version"),
+                    request.get("receiver_version"),
+                    request.get("idempotency_key"),
+                    db_session=db_session
+                )
             
-            if payer.version != payer_version:
-                raise ValueError("Payer account version mismatch")
+            except ValueError as e:
+                if atomic:
+                    if len(indexed_requests) == 1:
+                        raise
+                    raise ValueError(f"Batch request {index} failed: {e}") from e
+                
+                results.append({"index": index, "status": "error", "error": str(e)})
             
-            self._handle_withdrawal(amount, payer_id, password, db_session)
+            else:
+                results.append({"index": index, "status": "ok", "transaction": transaction})
+        
+        return results
+
+    def _apply_transaction(self, transaction_type: str, amount: float, payer_id: int = None, receiver_id: int = None, payer_version: int = None, receiver_version: int = None, idempotency_key: str = None, db_session: Session = None):
+        # Requests reach this point already authenticated. Balances only change through
+        # conditional updates that either apply fully or match nothing, so a rejected
+        # request leaves nothing behind in the transaction
+        if transaction_type == "deposit":
+            self._handle_deposit(amount, receiver_id, receiver_version, db_session)
+        
+        elif transaction_type == "withdrawal":
+            self._handle_withdrawal(amount, payer_id, payer_version, db_session)
         
         elif transaction_type == "transaction":
-            payer = db_session.query(BankAccount).filter_by(id=payer_id).first()
-            receiver = db_session.query(BankAccount).filter_by(id=receiver_id).first()
-            
-            if payer.version != payer_version:
-                raise ValueError("Payer account version mismatch")
-            
-            if receiver.version != receiver_version:
-                raise ValueError("Receiver account version mismatch")
-            
-            self._handle_transaction(amount, payer_id, receiver_id, password, db_session)
+            self._handle_transaction(amount, payer_id, receiver_id, payer_version, receiver_version, db_session)
 
-        db_session.flush()
+        # Balances moved through Core updates, which the flush listener does not see
+        record_changes(db_session, "bank_accounts", "update", [
+            (account_id, version)
+            for account_id, version in ((payer_id, payer_version), (receiver_id, receiver_version))
+            if account_id is not None
+        ])
 
         new_transaction = Transaction(
             amount=amount, 
             timestamp=datetime.now(timezone.utc),
-            transaction_type=transaction_type, 
+            transaction_type=RECORDED_TYPES.get(transaction_type, transaction_type), 
             payer=payer_id, 
             receiver=receiver_id
         )
         
         db_session.add(new_transaction)
         db_session.flush()  # Ensure the instance is bound to the session
+        
+        if idempotency_key is not None:
+            # Committed with the transaction, the primary key rejects a second use
+            db_session.execute(insert(IDEMPOTENCY_KEYS).values(key=idempotency_key, transaction_id=new_transaction.id))
 
+        return self._transaction_result(new_transaction)
+    
+    # Idempotency _________________________________________________________________
+    @read_operation
+    def _find_applied(self, request: dict, db_session: Session = None):
+        return self._replay(request, db_session)
+    
+    def _replay(self, request: dict, db_session: Session):
+        # Primary key lookups only, the cost does not grow with the ledger
+        key = request.get("idempotency_key")
+        if key is None:
+            return None
+        
+        transaction = db_session.execute(
+            select(Transaction)
+            .join(IDEMPOTENCY_KEYS, IDEMPOTENCY_KEYS.c.transaction_id == TRANSACTIONS.c.id)
+            .where(IDEMPOTENCY_KEYS.c.key == key)
+        ).scalar()
+        
+        if transaction is None:
+            return None
+        
+        requested = (
+            RECORDED_TYPES.get(request["transaction_type"], request["transaction_type"]),
+            request["amount"], request.get("payer_id"), request.get("receiver_id")
+        )
+        if requested != (transaction.transaction_type, transaction.amount, transaction.payer, transaction.receiver):
+            raise ValueError("Idempotency key was already used for a different transaction")
+        
+        result = self._transaction_result(transaction)
+        # Stored without a zone, the original answer carried it as UTC
+        result["timestamp"] = transaction.timestamp.replace(tzinfo=timezone.utc)
+        return result
+    
+    def _transaction_result(self, transaction: Transaction) -> dict:
         return {
-            "id": new_transaction.id,
-            "amount": new_transaction.amount,
-            "timestamp": new_transaction.timestamp,
-            "version": new_transaction.version,
-            "transaction_type": new_transaction.transaction_type,
-            "payer_id": new_transaction.payer,
-            "receiver_id": new_transaction.receiver
+            "id": transaction.id,
+            "amount": transaction.amount,
+            "timestamp": transaction.timestamp,
+            "version": transaction.version,
+            "transaction_type": transaction.transaction_type,
+            "payer_id": transaction.payer,
+            "receiver_id": transaction.receiver
         }
 
@@ -1,19 +1,133 @@
-import os
-from filelock import FileLock
-from cli import AccountManagerCLI
-from database.operations import create_access
+import argparse
+import sys
 from dotenv import load_dotenv
 
+# Before any database module, they read DATABASE_PATH when imported
 load_dotenv()
 
-# Database setup __________________________________________________________________________________
-DB_FILE = os.path.realpath(os.getenv("DATABASE_PATH"))
-LOCK_FILE = f"{DB_FILE}.lock"
-FILELOCK = FileLock(LOCK_FILE, timeout=10)
+from cli import AccountManagerCLI
+from database.daemon import DAEMON_SOCKET
+from database.settings import LOCK_FILE
+
+# Handlers served to the CLIs when this system runs the database daemon
+def daemon_handlers(row_cache=None) -> dict:
+    from database.account import AccountHandler
+    from database.bulk import BulkLoader
+    from database.client import ClientHandler
+    from database.feed import ChangeLogHandler
+    from database.spool import TransactionSpool
+    from database.stats import recorder
+    from database.transaction import TransactionHandler
+    
+    handlers = {
+        "account": AccountHandler,
+        "client": ClientHandler,
+        "bulk": BulkLoader,
+        "stats": lambda lock: recorder,
+        "changes": ChangeLogHandler,
+        "transaction": TransactionHandler,
+        # Drains in the daemon, next to the connection it writes with (started by serve_forever)
+        "spool": lambda lock: TransactionSpool(TransactionHandler(lock)),
+    }
+    
+    if row_cache is not None:
+        handlers.update(
+            account=lambda lock: AccountHandler(lock, row_cache=row_cache),
+            client=lambda lock: ClientHandler(lock, row_cache=row_cache),
+            transaction=lambda lock: TransactionHandler(lock, row_cache=row_cache),
+            spool=lambda lock: TransactionSpool(TransactionHandler(lock, row_cache=row_cache)),
+            row_cache=lambda lock: row_cache,
+        )
+    
+    return handlers
+
+def build_row_cache(filelock, max_entries: int):
+    from database.cache import RowCache
+    from database.feed import ChangeLogHandler
+    
+    return RowCache(ChangeLogHandler(filelock), max_entries=max_entries) if max_entries else None
+
+def run_script(cli: AccountManagerCLI, path: str, transaction: bool = False) -> None:
+    # Exits with status 1 when a command of the script failed
+    script = sys.stdin if path == "-" else open(path)
+    
+    try:
+        succeeded = cli.run_script(script, transaction=transaction)
+    finally:
+        if script is not sys.stdin:
+            script.close()
+    
+    if not succeeded:
+        sys.exit(1)
 
-ENGINE, SESSIONMAKER = create_access(create_table=True)
-ENGINE.dispose()
+def run_local_script(filelock, row_cache, path: str, transaction: bool, json_lines: bool) -> None:
+    from database.operations import NO_WRITE_LOCK, connection_manager
+    from database.scheduler import MAINTENANCE_PRIORITY, LockScheduler
+    
+    # The script owns the database until it ends: the write lock is taken once, the
+    # connection stays open, and the handlers do not lock again. Other processes'
+    # writes wait for the script, and their reads too unless they use a snapshot.
+    with LockScheduler(filelock).with_priority(MAINTENANCE_PRIORITY):
+        connection_manager.configure(persistent=True)
+        
+        try:
+            cli = AccountManagerCLI(NO_WRITE_LOCK, row_cache=row_cache, json_lines=json_lines)
+            run_script(cli, path, transaction)
+        finally:
+            connection_manager.dispose()
 
 # Main code _______________________________________________________________________________________
 if __name__ == "__main__":
-    AccountManagerCLI(FILELOCK).cmdloop()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--daemon", action="store_true", help="Own the database and serve operations over a Unix socket")
+    parser.add_argument("--connect", action="store_true", help="Send every operation to a running database daemon")
+    parser.add_argument("--socket", default=DAEMON_SOCKET, help="Unix socket of the database daemon")
+    parser.add_argument("--concurrent", action="store_true", help="With --daemon, run writes on different rows in parallel")
+    parser.add_argument("--row-cache", type=int, metavar="ROWS", help="Cache up to this many account and client rows in this process")
+    parser.add_argument("--script", metavar="FILE", help="Run the commands of this file, or of stdin with -, then exit")
+    parser.add_argument("--transaction", action="store_true", help="With --script, run the whole script in one database transaction")
+    parser.add_argument("--json", action="store_true", help="With --script, print JSON lines instead of tables")
+    args = parser.parse_args()
+    
+    if (args.transaction or args.json) and not args.script:
+        parser.error("--transaction and --json need --script")
+    
+    if args.transaction and args.connect:
+        parser.error("--transaction needs the database in this process, it cannot be used with --connect")
+    
+    if args.connect:
+        # The daemon owns the database file, this process never opens it nor loads the database layer
+        cli = AccountManagerCLI(None, daemon_address=args.socket, json_lines=args.json)
+        
+        if args.script:
+            run_script(cli, args.script)
+        else:
+            cli.cmdloop()
+    
+    else:
+        from filelock import FileLock
+        from database.operations import connection_manager, ensure_schema
+        
+        FILELOCK = FileLock(LOCK_FILE, timeout=10)
+        ensure_schema(FILELOCK)  # Only creates or migrates when the stored version differs
+        row_cache = build_row_cache(FILELOCK, args.row_cache)
+        
+        if args.daemon:
+            from database.daemon import DatabaseDaemon
+            DatabaseDaemon(daemon_handlers(row_cache), FILELOCK, address=args.socket, concurrent=args.concurrent).serve_forever()
+        
+        elif args.script:
+            run_local_script(FILELOCK, row_cache, args.script, args.transaction, args.json)
+        
+        else:
+            from database.scheduler import LockScheduler
+            
+            # Queues writes so transactions go before the account manager's maintenance
+            cli = AccountManagerCLI(LockScheduler(FILELOCK), row_cache=row_cache)
+            cli.spool.start()  # Also applies requests left by a previous session
+            
+            try:
+                cli.cmdloop()
+            finally:
+                cli.spool.stop()
+                connection_manager.dispose()  # Close the shared engine on CLI exit
\ No newline at end of file